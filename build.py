@@ -21,20 +21,67 @@ ASSETS_DIR = PROJECT_DIR / "assets"
 
 # Application info
 APP_NAME = "video-tools"
-MAIN_SCRIPT = "main.py"
 VERSION = "1.6.0"
+SPEC_FILE = PROJECT_DIR / f"{APP_NAME}.spec"
 
+# Already-compressed payloads stored as-is in the release ZIP
+STORED_EXTENSIONS = {".exe", ".dll"}
 
-def clean_build():
-    """Clean previous build artifacts."""
+
+def clean_dist():
+    """Clean previous output only (keeps PyInstaller work dir for incremental builds)."""
+    print("Cleaning previous output...")
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+
+
+def clean_all():
+    """Clean all previous build artifacts, including the PyInstaller work dir."""
     print("Cleaning previous build...")
     for folder in [DIST_DIR, BUILD_DIR]:
         if folder.exists():
             shutil.rmtree(folder)
-    
-    spec_file = PROJECT_DIR / f"{APP_NAME}.spec"
-    if spec_file.exists():
-        spec_file.unlink()
+
+
+def _copy_file(src: Path, dst: Path):
+    """Copy a single file using the fastest native path available."""
+    if sys.platform == "win32":
+        from ctypes import windll, c_wchar_p, c_int
+        copy_file_w = windll.kernel32.CopyFileW
+        copy_file_w.argtypes = [c_wchar_p, c_wchar_p, c_int]
+        if copy_file_w(str(src), str(dst), 0):
+            return
+    elif sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+        # Only Linux sendfile() writes to regular files (macOS requires a socket)
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                offset = 0
+                while True:
+                    sent = os.sendfile(dst_fd, src_fd, offset, 1 << 30)
+                    if sent == 0:
+                        break
+                    offset += sent
+        except OSError:
+            pass  # e.g. a filesystem without sendfile support: copy2 rewrites dst
+        else:
+            shutil.copystat(src, dst)
+            return
+    
+    # Fallback for platforms without a native fast path
+    shutil.copy2(src, dst)
+
+
+def _fast_copytree(src: Path, dst: Path):
+    """Copy directory tree (like shutil.copytree with dirs_exist_ok=True)."""
+    dst.mkdir(parents=True, exist_ok=True)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            target = dst / entry.name
+            if entry.is_dir(follow_symlinks=False):
+                _fast_copytree(Path(entry.path), target)
+            else:
+                _copy_file(Path(entry.path), target)
 
 
 def check_pyinstaller():
@@ -48,43 +95,28 @@ def check_pyinstaller():
         return True
 
 
-def build_exe():
-    """Build the executable using PyInstaller."""
+def build_exe(force_reanalyze: bool = False):
+    """
+    Build the executable using PyInstaller.
+    
+    Args:
+        force_reanalyze: Pass --clean to PyInstaller to discard its analysis cache.
+    """
     check_pyinstaller()
-    clean_build()
+    clean_dist()
     
     print(f"Building {APP_NAME}.exe v{VERSION}...")
     
-    # Build arguments
+    # Build configuration lives in the committed spec file
     args = [
         sys.executable, "-m", "PyInstaller",
-        "--name", APP_NAME,
-        "--onefile",
-        "--console",
         "--noconfirm",
-        "--clean",
-        
-        # Hidden imports
-        "--hidden-import", "colorama",
-        "--hidden-import", "termcolor",
-        "--hidden-import", "InquirerPy",
-        "--hidden-import", "prompt_toolkit",
-        "--hidden-import", "requests",
-        "--hidden-import", "bs4",
-        "--hidden-import", "dotenv",
-        "--hidden-import", "tqdm",
-        
-        # Add data files
-        "--add-data", f"requirements.txt{os.pathsep}.",
     ]
     
-    # Add icon if exists
-    icon_path = (ASSETS_DIR / "icon.ico").resolve()
-    if icon_path.exists():
-        args.extend(["--icon", str(icon_path)])
-        print(f"  Using icon: {icon_path}")
+    if force_reanalyze:
+        args.append("--clean")
     
-    args.append(MAIN_SCRIPT)
+    args.append(str(SPEC_FILE))
     
     # Run PyInstaller
     result = subprocess.run(args, cwd=PROJECT_DIR)
@@ -101,7 +133,7 @@ def build_exe():
             dist_bin = DIST_DIR / "bin"
             if BIN_DIR.exists():
                 print("  Copying bin folder...")
-                shutil.copytree(BIN_DIR, dist_bin, dirs_exist_ok=True)
+                _fast_copytree(BIN_DIR, dist_bin)
             
             # Create cache folder
             cache_dir = DIST_DIR / "cache"
@@ -127,14 +159,19 @@ def create_release_package():
     
     print(f"Creating release package: {zip_name}")
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+    # Executables are already compressed: store them, deflate only small text files
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
         exe_path = DIST_DIR / f"{APP_NAME}.exe"
-        zf.write(exe_path, f"{APP_NAME}.exe")
+        zf.write(exe_path, f"{APP_NAME}.exe", compress_type=zipfile.ZIP_STORED)
         
         dist_bin = DIST_DIR / "bin"
         if dist_bin.exists():
             for file in dist_bin.iterdir():
-                zf.write(file, f"bin/{file.name}")
+                if file.suffix.lower() in STORED_EXTENSIONS:
+                    compress_type = zipfile.ZIP_STORED
+                else:
+                    compress_type = zipfile.ZIP_DEFLATED
+                zf.write(file, f"bin/{file.name}", compress_type=compress_type)
         
         readme = PROJECT_DIR / "README.md"
         if readme.exists():
@@ -151,13 +188,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Build Video Tools CLI")
     parser.add_argument("--clean", action="store_true", help="Clean build artifacts only")
     parser.add_argument("--package", action="store_true", help="Create release package after build")
+    parser.add_argument("--force-reanalyze", action="store_true", help="Discard PyInstaller analysis cache")
     
     args = parser.parse_args()
     
     if args.clean:
-        clean_build()
+        clean_all()
         print("[OK] Cleaned build artifacts")
     else:
-        if build_exe():
+        if build_exe(force_reanalyze=args.force_reanalyze):
             if args.package:
                 create_release_package()
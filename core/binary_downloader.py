@@ -4,140 +4,411 @@ Binary downloader - Auto-downloads FFmpeg, FFprobe, and TDL if missing.
 import os
 import sys
 import zipfile
-import tempfile
 import shutil
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from urllib.request import urlretrieve
+from typing import Dict, List, NamedTuple, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
 from utils.logger import log
+from utils.path_utils import path_exists, list_dir_names
+from .config import CACHE_DIR, rescan_binaries
+
+class BinarySpec(NamedTuple):
+    """Where to fetch a binary from and how to find it in the archive."""
+    url: str
+    zip_path: str
+    filename: str
+    # SHA256 of the archive for pinned release URLs; None for rolling "latest" builds,
+    # whose content changes with every release and cannot be pinned
+    sha256: Optional[str] = None
+
 
 # Download URLs (Windows x64)
 BINARY_URLS = {
-    "ffmpeg": {
-        "url": "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip",
-        "zip_path": "ffmpeg-master-latest-win64-gpl/bin/ffmpeg.exe",
-        "filename": "ffmpeg.exe"
-    },
-    "ffprobe": {
-        "url": "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip",
-        "zip_path": "ffmpeg-master-latest-win64-gpl/bin/ffprobe.exe",
-        "filename": "ffprobe.exe"
-    },
-    "tdl": {
-        "url": "https://github.com/iyear/tdl/releases/latest/download/tdl_Windows_64bit.zip",
-        "zip_path": "tdl.exe",
-        "filename": "tdl.exe"
-    }
+    "ffmpeg": BinarySpec(
+        url="https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip",
+        zip_path="ffmpeg-master-latest-win64-gpl/bin/ffmpeg.exe",
+        filename="ffmpeg.exe",
+    ),
+    "ffprobe": BinarySpec(
+        url="https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip",
+        zip_path="ffmpeg-master-latest-win64-gpl/bin/ffprobe.exe",
+        filename="ffprobe.exe",
+    ),
+    "tdl": BinarySpec(
+        url="https://github.com/iyear/tdl/releases/latest/download/tdl_Windows_64bit.zip",
+        zip_path="tdl.exe",
+        filename="tdl.exe",
+    ),
 }
 
+# Persistent cache for downloaded archives (survives across runs)
+DOWNLOAD_CACHE_DIR = CACHE_DIR / "downloads"
+
+# Download tuning
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB per read/write
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Shared session so ffmpeg/ffprobe/tdl downloads reuse keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+# Per-URL locks so concurrent installs never race on the same cached archive
+_ARCHIVE_LOCKS: Dict[str, threading.Lock] = {}
+_ARCHIVE_LOCKS_GUARD = threading.Lock()
+
+
+def _archive_lock(url: str) -> threading.Lock:
+    """Get (or create) the lock guarding a cached archive."""
+    with _ARCHIVE_LOCKS_GUARD:
+        return _ARCHIVE_LOCKS.setdefault(url, threading.Lock())
 
-def download_with_progress(url: str, dest: str, name: str) -> bool:
-    """Download file with progress indication."""
+
+def _read_validator(path: Path) -> Optional[str]:
+    """Read the ETag/Last-Modified saved next to a download (None if missing)."""
+    try:
+        return path.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def _write_validator(path: Path, validator: Optional[str]):
+    """Save (or clear) the validator a download was fetched under."""
+    if validator:
+        path.write_text(validator, encoding="utf-8")
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _response_validator(response) -> Optional[str]:
+    """Strong ETag or Last-Modified of a response, usable in If-Range (None if neither)."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _range_total(response) -> int:
+    """Full size from a 'Content-Range: bytes */N' header (0 if absent)."""
+    _, _, total = response.headers.get("Content-Range", "").rpartition("/")
+    return int(total) if total.isdigit() else 0
+
+
+def download_with_progress(url: str, dest: str, name: str, validator_path: Optional[Path] = None,
+                           position: int = 0) -> Optional[str]:
+    """
+    Download file with progress indication.
+    
+    Args:
+        validator_path: Where the ETag/Last-Modified of a partial dest is kept. If given, the
+            validator is saved as soon as a download starts, and a later call resumes via
+            Range + If-Range, so a remote file that changed in between is fetched from scratch.
+        position: tqdm line for this download when several run at once.
+    
+    Returns:
+        Validator of the downloaded file ("" if the server sent none), or None on failure
+    """
     try:
         log.info(f"Downloading {name}...")
         log.detail("URL", url[:80] + "..." if len(url) > 80 else url)
         
-        def reporthook(block_num, block_size, total_size):
-            downloaded = block_num * block_size
-            if total_size > 0:
-                pct = min(downloaded / total_size * 100, 100)
-                mb_downloaded = downloaded / (1024 * 1024)
-                mb_total = total_size / (1024 * 1024)
-                print(f"\r         Downloading: {mb_downloaded:.1f}/{mb_total:.1f} MB ({pct:.0f}%)", end="", flush=True)
+        # A partial without a saved validator cannot be checked against the remote file
+        resume_validator = _read_validator(validator_path) if validator_path else None
+        offset = 0
+        if resume_validator:
+            try:
+                offset = os.path.getsize(dest)
+            except OSError:
+                offset = 0
         
-        urlretrieve(url, dest, reporthook)
-        print()  # New line after progress
-        return True
+        headers = {}
+        if offset:
+            # Byte offsets only make sense on the unencoded body; If-Range turns the
+            # request into a full download if the file changed since the partial was saved
+            headers = {"Range": f"bytes={offset}-", "If-Range": resume_validator, "Accept-Encoding": "identity"}
+        
+        with _SESSION.get(url, stream=True, timeout=(5, 30), headers=headers) as response:
+            if offset and response.status_code == 416:
+                # Only a range starting exactly at the (unchanged) end is a complete file
+                if _range_total(response) == offset:
+                    log.info(f"{name} already fully downloaded")
+                    return resume_validator
+                log.warning(f"Partial download of {name} is stale, starting over")
+                _write_validator(validator_path, None)
+                return download_with_progress(url, dest, name, validator_path, position)
+            
+            response.raise_for_status()
+            validator = _response_validator(response) or ""
+            
+            if offset and response.status_code == 206:
+                log.info(f"Resuming from {offset / (1024 * 1024):.1f} MB")
+                mode = "ab"
+            else:
+                # Fresh download, changed remote file, or range ignored: start over
+                offset = 0
+                mode = "wb"
+                if validator_path:
+                    _write_validator(validator_path, validator)
+            
+            total_size = int(response.headers.get("Content-Length", 0) or 0)
+            if total_size:
+                total_size += offset
+            
+            # tqdm throttles redraws itself; plain consoles get a log line per 10%
+            bar = None
+            if sys.stdout.isatty():
+                bar = tqdm(total=total_size or None, initial=offset, unit="B", unit_scale=True,
+                           unit_divisor=1024, desc=f"         {name}", position=position, leave=True)
+            mb_total = total_size / (1024 * 1024)
+            downloaded = offset
+            next_report = 10
+            
+            try:
+                with open(dest, mode, buffering=DOWNLOAD_CHUNK_SIZE) as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        
+                        if bar is not None:
+                            bar.update(len(chunk))
+                        elif total_size > 0:
+                            pct = min(downloaded / total_size * 100, 100)
+                            if pct >= next_report:
+                                # Whole lines through the locked logger: concurrent downloads never overwrite each other
+                                log.detail(name, f"{downloaded / (1024 * 1024):.1f}/{mb_total:.1f} MB ({pct:.0f}%)")
+                                next_report = int(pct) // 10 * 10 + 10
+            finally:
+                if bar is not None:
+                    bar.close()
+        
+        if total_size and downloaded < total_size:
+            log.error(f"Download incomplete: {downloaded}/{total_size} bytes")
+            return None
+        return validator
     except Exception as e:
         log.error(f"Download failed: {e}")
+        return None
+
+
+def _open_and_index(zip_path: str):
+    """Open a ZIP archive and index its member names once."""
+    zf = zipfile.ZipFile(zip_path, 'r')
+    names = zf.namelist()
+    return zf, set(names), names
+
+
+def _extract_member(zf: zipfile.ZipFile, names_set: set, names: list,
+                    internal_path: str, dest_path: str) -> bool:
+    """Extract one member from an already indexed archive."""
+    # Try exact path first
+    member = internal_path if internal_path in names_set else None
+    
+    # Search for filename in any subfolder
+    if member is None:
+        filename = os.path.basename(internal_path)
+        member = next((name for name in names if name.endswith(filename)), None)
+    
+    if member is None:
+        log.error(f"File not found in archive: {internal_path}")
         return False
+    
+    with zf.open(member) as src, open(dest_path, 'wb', buffering=DOWNLOAD_CHUNK_SIZE) as dst:
+        shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+    return True
 
 
 def extract_from_zip(zip_path: str, internal_path: str, dest_path: str) -> bool:
     """Extract specific file from ZIP archive."""
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            # Try exact path first
-            if internal_path in zf.namelist():
-                with zf.open(internal_path) as src, open(dest_path, 'wb') as dst:
-                    dst.write(src.read())
-                return True
-            
-            # Search for filename in any subfolder
-            filename = os.path.basename(internal_path)
-            for name in zf.namelist():
-                if name.endswith(filename):
-                    with zf.open(name) as src, open(dest_path, 'wb') as dst:
-                        dst.write(src.read())
-                    return True
-        
-        log.error(f"File not found in archive: {internal_path}")
+        zf, names_set, names = _open_and_index(zip_path)
+        with zf:
+            return _extract_member(zf, names_set, names, internal_path, dest_path)
+    except Exception as e:
+        log.error(f"Extraction failed: {e}")
         return False
+
+
+@lru_cache(maxsize=1)
+def _download_cache_dir() -> Path:
+    """Create the shared download cache directory once per process."""
+    DOWNLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return DOWNLOAD_CACHE_DIR
+
+
+@lru_cache(maxsize=None)
+def _cached_zip_path(url: str) -> Path:
+    """Get persistent cache location for a downloaded archive."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return _download_cache_dir() / f"{digest}.zip"
+
+
+def _file_sha256(path: Path) -> str:
+    """SHA256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pinned_sha256(url: str) -> Optional[str]:
+    """Pinned archive digest for url (None if its binaries are unpinned)."""
+    return next((spec.sha256 for spec in BINARY_URLS.values() if spec.url == url and spec.sha256), None)
+
+
+def _remote_info(url: str):
+    """Get (Content-Length, validator) of a remote file via HEAD ((0, None) if unknown)."""
+    try:
+        response = _SESSION.head(url, allow_redirects=True, timeout=(5, 15))
+        return int(response.headers.get("Content-Length", 0) or 0), _response_validator(response)
+    except (requests.RequestException, ValueError):
+        return 0, None
+
+
+def fetch_archive(url: str, name: str, position: int = 0, sha256: Optional[str] = None) -> Optional[Path]:
+    """
+    Download an archive once into the persistent download cache.
+    Rolling "latest" URLs are reused from the cache, and an interrupted download resumed,
+    only while the server still reports the ETag/Last-Modified it was fetched under
+    (saved in a ".validator" file next to it).
+    
+    Args:
+        position: tqdm line for this download when several run at once.
+        sha256: Pinned digest; a cached archive that matches it is used as is, and a
+            fresh download that does not is discarded.
+    
+    Returns:
+        Path to cached archive, or None on failure
+    """
+    zip_path = _cached_zip_path(url)
+    zip_validator_path = zip_path.with_name(zip_path.name + ".validator")
+    part_path = zip_path.with_name(zip_path.name + ".part")
+    part_validator_path = part_path.with_name(part_path.name + ".validator")
+    
+    with _archive_lock(url):
+        try:
+            cached_size = zip_path.stat().st_size
+        except FileNotFoundError:
+            cached_size = 0
+        if cached_size > 0 and sha256:
+            # Pinned content never changes: the digest alone decides
+            if _file_sha256(zip_path) == sha256.lower():
+                log.info(f"Using cached download for {name}")
+                return zip_path
+            log.warning(f"Cached download of {name} does not match its SHA256, fetching again")
+        elif cached_size > 0:
+            remote_size, remote_validator = _remote_info(url)
+            cached_validator = _read_validator(zip_validator_path)
+            if cached_size == remote_size and (cached_validator is None or cached_validator == remote_validator):
+                log.info(f"Using cached download for {name}")
+                return zip_path
+        
+        validator = download_with_progress(url, str(part_path), name, part_validator_path, position)
+        if validator is None:
+            return None
+        
+        if sha256:
+            actual = _file_sha256(part_path)
+            if actual != sha256.lower():
+                # Never resume from or extract a corrupt or tampered archive
+                log.error(f"SHA256 mismatch for {name}", details=f"expected {sha256.lower()}, got {actual}")
+                part_path.unlink(missing_ok=True)
+                part_validator_path.unlink(missing_ok=True)
+                return None
+            log.info(f"SHA256 verified for {name}")
+        
+        os.replace(part_path, zip_path)
+        _write_validator(zip_validator_path, validator)
+        part_validator_path.unlink(missing_ok=True)
+        return zip_path
+
+
+def _extract_binaries(zip_path: Path, binary_names: List[str], bin_dir: Path) -> bool:
+    """Extract all requested binaries from a downloaded archive in one pass."""
+    try:
+        zf, names_set, names = _open_and_index(str(zip_path))
     except Exception as e:
         log.error(f"Extraction failed: {e}")
         return False
+    
+    all_installed = True
+    with zf:
+        for binary_name in binary_names:
+            config = BINARY_URLS[binary_name]
+            dest_path = bin_dir / config.filename
+            try:
+                extracted = _extract_member(zf, names_set, names, config.zip_path, str(dest_path))
+            except Exception as e:
+                log.error(f"Extraction failed: {e}")
+                extracted = False
+            
+            if extracted:
+                log.success(f"Installed: {config.filename}")
+            else:
+                all_installed = False
+    
+    return all_installed
+
+
+def _install_from_url(url: str, binary_names: List[str], bin_dir: Path) -> bool:
+    """Download an archive once and extract all requested binaries from it."""
+    log.section(f"Installing {', '.join(b.upper() for b in binary_names)}")
+    
+    zip_path = fetch_archive(url, " + ".join(binary_names), sha256=_pinned_sha256(url))
+    if not zip_path:
+        return False
+    
+    return _extract_binaries(zip_path, binary_names, bin_dir)
+
+
+def _group_missing_by_url(binary_names: List[str], bin_dir: Path) -> Dict[str, List[str]]:
+    """Group missing binaries by their source archive URL."""
+    present = list_dir_names(bin_dir)
+    groups = defaultdict(list)
+    for binary_name in binary_names:
+        config = BINARY_URLS[binary_name]
+        if config.filename not in present:
+            groups[config.url].append(binary_name)
+    return groups
 
 
 def download_binary(binary_name: str, bin_dir: Path) -> bool:
-    """Download a specific binary to the bin directory."""
+    """
+    Download a specific binary to the bin directory.
+    Binaries sharing the same archive (ffmpeg/ffprobe) are installed together.
+    """
     if binary_name not in BINARY_URLS:
         log.error(f"Unknown binary: {binary_name}")
         return False
     
     config = BINARY_URLS[binary_name]
-    dest_path = bin_dir / config["filename"]
+    dest_path = bin_dir / config.filename
     
     # Skip if already exists
-    if dest_path.exists():
+    if path_exists(dest_path):
         return True
     
-    log.section(f"Installing {binary_name.upper()}")
-    
-    # Download to temp directory
-    temp_dir = Path(tempfile.mkdtemp(prefix="video_tools_"))
-    zip_path = temp_dir / "download.zip"
+    siblings = [name for name, cfg in BINARY_URLS.items() if cfg.url == config.url]
+    groups = _group_missing_by_url(siblings, bin_dir)
+    _install_from_url(config.url, groups[config.url], bin_dir)
     
-    try:
-        # Check if we need to download (ffmpeg and ffprobe share same ZIP)
-        if binary_name in ["ffmpeg", "ffprobe"]:
-            # Check if we already downloaded for ffmpeg
-            ffmpeg_config = BINARY_URLS["ffmpeg"]
-            ffprobe_config = BINARY_URLS["ffprobe"]
-            
-            if not download_with_progress(config["url"], str(zip_path), binary_name):
-                return False
-            
-            # Extract both ffmpeg and ffprobe from same zip
-            ffmpeg_dest = bin_dir / ffmpeg_config["filename"]
-            ffprobe_dest = bin_dir / ffprobe_config["filename"]
-            
-            if not ffmpeg_dest.exists():
-                if extract_from_zip(str(zip_path), ffmpeg_config["zip_path"], str(ffmpeg_dest)):
-                    log.success(f"Installed: {ffmpeg_config['filename']}")
-            
-            if not ffprobe_dest.exists():
-                if extract_from_zip(str(zip_path), ffprobe_config["zip_path"], str(ffprobe_dest)):
-                    log.success(f"Installed: {ffprobe_config['filename']}")
-            
-            return dest_path.exists()
-        else:
-            # TDL or other binaries
-            if not download_with_progress(config["url"], str(zip_path), binary_name):
-                return False
-            
-            if extract_from_zip(str(zip_path), config["zip_path"], str(dest_path)):
-                log.success(f"Installed: {config['filename']}")
-                return True
-            return False
-            
-    finally:
-        # Cleanup temp files
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    return path_exists(dest_path)
 
 
 def ensure_binaries(bin_dir: Path, required: list = None) -> bool:
     """
     Ensure all required binaries are available.
-    Downloads missing ones automatically.
+    Downloads missing ones automatically, fetching each archive only once.
     
     Args:
         bin_dir: Path to bin directory
@@ -150,18 +421,40 @@ def ensure_binaries(bin_dir: Path, required: list = None) -> bool:
         required = ["ffmpeg", "ffprobe"]  # TDL is optional
     
     # Create bin directory if missing
-    if not bin_dir.exists():
+    if not path_exists(bin_dir):
         log.info("Creating bin directory...")
         bin_dir.mkdir(parents=True, exist_ok=True)
     
     all_present = True
+    known = []
     for binary in required:
-        filename = BINARY_URLS.get(binary, {}).get("filename", f"{binary}.exe")
-        binary_path = bin_dir / filename
-        
-        if not binary_path.exists():
-            log.warning(f"{binary} not found, downloading...")
-            if not download_binary(binary, bin_dir):
-                all_present = False
+        if binary in BINARY_URLS:
+            known.append(binary)
+        else:
+            log.error(f"Unknown binary: {binary}")
+            all_present = False
+    
+    groups = _group_missing_by_url(known, bin_dir)
+    if not groups:
+        return all_present
+    
+    for binaries in groups.values():
+        log.warning(f"{', '.join(binaries)} not found, downloading...")
+    
+    # Archives come from different hosts and are I/O bound: fetch them concurrently
+    # (each gets its own progress line)
+    with ThreadPoolExecutor(max_workers=min(4, len(groups))) as executor:
+        futures = {
+            url: executor.submit(fetch_archive, url, " + ".join(binaries), position, _pinned_sha256(url))
+            for position, (url, binaries) in enumerate(groups.items())
+        }
+    
+    # Extract serially once all downloads are done
+    for url, binaries in groups.items():
+        zip_path = futures[url].result()
+        if not zip_path or not _extract_binaries(zip_path, binaries, bin_dir):
+            all_present = False
     
+    # Newly installed binaries must not be shadowed by cached PATH fallbacks
+    rescan_binaries()
     return all_present
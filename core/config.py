@@ -4,8 +4,10 @@ Handles PyInstaller frozen builds and development mode.
 """
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import NamedTuple
+from utils.path_utils import path_exists
 
 
 def get_app_dir() -> Path:
@@ -28,77 +30,154 @@ BIN_DIR = APP_DIR / "bin"
 CACHE_DIR = APP_DIR / "cache"
 ENV_PATH = APP_DIR / ".env"
 
+# Keys snapshotted from the environment after .env is loaded
+ENV_KEYS = ("MAX_QUEUE", "DOWNLOAD_MAX_CONNECTION", "OVERRIDE_ENCODING", "COMPRESSION_LEVEL")
+_ENV_CACHE = {}
+# Contents of .env as last read or written, so saving a setting needs no re-parse
+_FILE_ENV = {}
+# Raw .env lines (comments and order included), patched in place by save_env
+_FILE_LINES = []
+
+# Default .env contents written on first run
+_DEFAULT_ENV = (
+    b"MAX_QUEUE=0\n"
+    b"DOWNLOAD_MAX_CONNECTION=0\n"
+    b"OVERRIDE_ENCODING=\n"
+    b"COMPRESSION_LEVEL=medium\n"
+)
+
+# Set once load_config has run for this process
+_INITIALIZED = False
+
+class CompressionPreset(NamedTuple):
+    """Encoder settings for a compression level."""
+    crf: int
+    preset: str
+    description: str
+
+
 # Compression presets (CRF values for x264/x265, lower = better quality, higher file size)
 COMPRESSION_LEVELS = {
-    "low": {"crf": 28, "preset": "fast", "description": "Low quality, small file"},
-    "medium": {"crf": 23, "preset": "medium", "description": "Balanced quality/size"},
-    "high": {"crf": 18, "preset": "slow", "description": "High quality, large file"}
+    "low": CompressionPreset(crf=28, preset="fast", description="Low quality, small file"),
+    "medium": CompressionPreset(crf=23, preset="medium", description="Balanced quality/size"),
+    "high": CompressionPreset(crf=18, preset="slow", description="High quality, large file"),
 }
 
 
 def ensure_bin_dir():
     """Ensure bin directory exists."""
-    if not BIN_DIR.exists():
+    if not path_exists(BIN_DIR):
         BIN_DIR.mkdir(parents=True, exist_ok=True)
         print(f"Created bin directory at {BIN_DIR}")
 
 
 def ensure_cache_dir():
     """Ensure cache directory exists for temporary processing files."""
-    if not CACHE_DIR.exists():
+    if not path_exists(CACHE_DIR):
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
     return CACHE_DIR
 
 
-def ensure_config():
-    """Ensure .env file exists with default values."""
-    if not ENV_PATH.exists():
-        default_config = (
-            "MAX_QUEUE=2\n"
-            "DOWNLOAD_MAX_CONNECTION=4\n"
-            "OVERRIDE_ENCODING=\n"
-            "COMPRESSION_LEVEL=medium\n"
-        )
+def ensure_config() -> bool:
+    """
+    Ensure .env file exists with default values.
+    
+    Returns:
+        True if the default file was written by this call
+    """
+    if not path_exists(ENV_PATH):
         try:
-            with open(ENV_PATH, "w", encoding="utf-8") as f:
-                f.write(default_config)
+            with open(ENV_PATH, "wb") as f:
+                f.write(_DEFAULT_ENV)
             print(f"Created default configuration at {ENV_PATH}")
+            return True
         except Exception as e:
             print(f"Error creating .env file: {e}")
+    return False
+
+
+def read_env_lines(path: Path) -> list:
+    """Read an env file as a list of lines with their line endings (empty if missing)."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return []
+    return raw.decode("utf-8", errors="replace").splitlines(keepends=True)
+
+
+def _env_line_key(line: str):
+    """Key set by a KEY=VALUE line, or None for blanks and comments."""
+    line = line.strip()
+    if not line or line.startswith("#") or "=" not in line:
+        return None
+    return line.partition("=")[0].strip()
+
+
+def parse_env_lines(lines: list) -> dict:
+    """Parse simple KEY=VALUE lines (no interpolation)."""
+    data = {}
+    for line in lines:
+        key = _env_line_key(line)
+        if key is not None:
+            data[key] = line.strip().partition("=")[2].strip().strip("\"'")
+    return data
+
+
+def parse_env(path: Path) -> dict:
+    """Parse simple KEY=VALUE lines from an env file (no interpolation)."""
+    return parse_env_lines(read_env_lines(path))
 
 
 def load_config():
-    """Load configuration from .env."""
-    ensure_config()
+    """Load configuration from .env (runs at most once per process)."""
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+    
+    created = ensure_config()
     ensure_bin_dir()
     ensure_cache_dir()
-    load_dotenv(ENV_PATH)
+    
+    # Existing environment variables take precedence over .env
+    # (a file just written from the defaults is not read back)
+    if created:
+        _FILE_LINES[:] = _DEFAULT_ENV.decode("utf-8").splitlines(keepends=True)
+    else:
+        _FILE_LINES[:] = read_env_lines(ENV_PATH)
+    _FILE_ENV.clear()
+    _FILE_ENV.update(parse_env_lines(_FILE_LINES))
+    for key, value in _FILE_ENV.items():
+        os.environ.setdefault(key, value)
+    _ENV_CACHE.clear()
+    _ENV_CACHE.update({key: os.environ.get(key) for key in ENV_KEYS})
+    _INITIALIZED = True
 
 
+@lru_cache(maxsize=None)
 def get_binary_path(binary_name: str) -> str:
     """
-    Get the absolute path to a binary.
+    Get the absolute path to a binary (cached for the process lifetime).
     Prioritizes:
     1. bin/ folder next to the application.
     2. System PATH.
     """
-    ensure_bin_dir()
-    
     if sys.platform == "win32" and not binary_name.lower().endswith(".exe"):
         binary_name_with_ext = binary_name + ".exe"
     else:
         binary_name_with_ext = binary_name
 
     local_bin = BIN_DIR / binary_name_with_ext
-    if local_bin.exists():
+    if path_exists(local_bin):
         return str(local_bin)
     
     # Try to auto-download missing binaries
     if binary_name in ["ffmpeg", "ffprobe", "tdl"]:
         try:
             from .binary_downloader import download_binary
+            ensure_bin_dir()
             if download_binary(binary_name, BIN_DIR):
-                if local_bin.exists():
+                if path_exists(local_bin):
                     return str(local_bin)
         except Exception as e:
             print(f"Warning: Could not auto-download {binary_name}: {e}")
@@ -106,6 +185,11 @@ def get_binary_path(binary_name: str) -> str:
     return binary_name_with_ext if sys.platform == "win32" else binary_name
 
 
+def rescan_binaries():
+    """Forget cached binary paths (call after installing binaries explicitly)."""
+    get_binary_path.cache_clear()
+
+
 def get_temp_dir() -> Path:
     """Get temporary directory for video processing chunks."""
     temp_dir = CACHE_DIR / f"temp_{os.getpid()}"
@@ -115,27 +199,87 @@ def get_temp_dir() -> Path:
 
 def get_env(key: str, default=None):
     """Get environment variable with optional default."""
+    if key in _ENV_CACHE:
+        value = _ENV_CACHE[key]
+        return default if value is None else value
     return os.getenv(key, default)
 
 
-def get_compression_settings(level: str = None) -> dict:
+def auto_max_queue() -> int:
+    """Parallel workers used when MAX_QUEUE is 0 or unset: one per CPU core, kept within 2-8."""
+    return max(2, min(os.cpu_count() or 4, 8))
+
+
+def save_env(key: str, value: str):
+    """
+    Persist a setting to .env and make it visible to get_env immediately.
+    Only the line for key changes (appended if missing); comments and key order are kept.
+    
+    Raises:
+        OSError: If the .env file cannot be written.
+    """
+    if _FILE_ENV.get(key) == value and os.environ.get(key) == value:
+        # Re-confirming the current value (e.g. Enter on the default): nothing to write
+        return
+    
+    lines = list(_FILE_LINES)
+    new_line = f"{key}={value}\n"
+    for i, line in enumerate(lines):
+        if _env_line_key(line) == key:
+            lines[i] = new_line
+            break
+    else:
+        if lines and not lines[-1].endswith(("\n", "\r")):
+            lines[-1] += "\n"
+        lines.append(new_line)
+    payload = "".join(lines).encode("utf-8")
+    
+    # Write a sibling file and swap it in, so a crash never leaves a half-written .env
+    tmp_path = ENV_PATH.with_name(ENV_PATH.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, ENV_PATH)
+    
+    _FILE_LINES[:] = lines
+    _FILE_ENV[key] = value
+    os.environ[key] = value
+    _ENV_CACHE[key] = value
+
+
+@lru_cache(maxsize=None)
+def _lookup_compression(level: str) -> CompressionPreset:
+    """Resolve a (case-insensitive) level name to its preset."""
+    return COMPRESSION_LEVELS.get(level.lower(), COMPRESSION_LEVELS["medium"])
+
+
+def get_compression_settings(level: str = None) -> CompressionPreset:
     """Get compression settings for given level."""
     if level is None:
         level = get_env("COMPRESSION_LEVEL", "medium")
-    return COMPRESSION_LEVELS.get(level.lower(), COMPRESSION_LEVELS["medium"])
+    return _lookup_compression(level)
+
 
+DEFAULT_EXTENSION = ".mp4"
 
-def ensure_output_extension(filename: str, extension: str = ".mp4") -> str:
+
+def ensure_output_extension(filename: str, extension: str = DEFAULT_EXTENSION) -> str:
     """Ensure filename has the specified extension."""
     if not filename:
         return filename
     
-    if not filename.lower().endswith(extension.lower()):
-        return filename + extension
+    # Default extension is already lowercase; only compare the tail
+    ext_lower = extension if extension is DEFAULT_EXTENSION else extension.lower()
+    if filename[-len(ext_lower):].lower() != ext_lower:
+        return f"{filename}{extension}"
     
     return filename
 
 
+def _derive_name(input_file: Path, suffix: str = "") -> str:
+    """Derive output filename from input file stem."""
+    return f"{input_file.stem}{suffix}{DEFAULT_EXTENSION}"
+
+
 def get_output_path(input_path: str, output_name: str, suffix: str = "") -> str:
     """
     Get output path in same folder as input file.
@@ -149,20 +293,15 @@ def get_output_path(input_path: str, output_name: str, suffix: str = "") -> str:
         Full output path in source folder
     """
     input_file = Path(input_path).resolve()
-    source_folder = input_file.parent
     
     if output_name and output_name.strip():
         # User provided a name, ensure extension
         filename = ensure_output_extension(output_name.strip())
     else:
         # Empty output - derive from input
-        stem = input_file.stem
-        if suffix:
-            filename = f"{stem}{suffix}.mp4"
-        else:
-            filename = f"{stem}.mp4"
+        filename = _derive_name(input_file, suffix)
     
-    return str(source_folder / filename)
+    return str(input_file.parent / filename)
 
 
 def get_output_name(input_path: str, output_name: str, suffix: str = "") -> str:
@@ -170,10 +309,4 @@ def get_output_name(input_path: str, output_name: str, suffix: str = "") -> str:
     if output_name and output_name.strip():
         return ensure_output_extension(output_name.strip())
     
-    input_file = Path(input_path)
-    stem = input_file.stem
-    
-    if suffix:
-        return f"{stem}{suffix}.mp4"
-    else:
-        return f"{stem}.mp4"
+    return _derive_name(Path(input_path), suffix)
@@ -4,16 +4,59 @@ Uses application cache folder for temporary files.
 """
 import subprocess
 import os
+import sys
 import shutil
+import tempfile
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple, Optional, TYPE_CHECKING
+from typing import Iterator, List, Tuple, Optional, TYPE_CHECKING
 from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils.logger import log
+from utils.process_utils import NEW_GROUP_KWARGS, track, untrack
 from .config import CACHE_DIR
 
 if TYPE_CHECKING:
     from .ffmpeg_handler import FFmpegHandler
 
+# Fetch the whole source via byte ranges only if the segment covers at least this fraction of it
+RANGE_FETCH_MIN_COVERAGE = 0.5
+RANGE_COPY_BUFFER = 1024 * 1024
+RANGE_PART_SIZE = 8 * 1024 * 1024
+# Bytes fetched to check whether the container can be demuxed from a pipe
+STREAM_PROBE_BYTES = 64 * 1024
+
+# max_workers sentinel: measure the link and pick a connection count per host
+AUTO_WORKERS = 0
+DEFAULT_AUTO_WORKERS = 4
+MAX_AUTO_WORKERS = 16
+AUTO_PROBE_BYTES = 256 * 1024
+# (upper bound in Mbps, workers) for measured aggregate throughput of two probe connections
+SPEED_PROFILES = ((50, 3), (500, 6), (float("inf"), MAX_AUTO_WORKERS))
+
+# Auto worker tuning: throughput changes within this fraction count as noise (hold the
+# count), and a held count is re-probed after this many samples
+TUNING_TOLERANCE = 0.05
+TUNING_PROBE_EVERY = 5
+
+# Segments of one batch that always download side by side, even on a 1-2 core machine
+MIN_CONCURRENT_SEGMENTS = 2
+
+# Keep at most this much of a child's stderr; the rest is read and discarded
+MAX_STDERR_BYTES = 4096
+
+# MPEG-TS has no global index, so chunks in these containers join byte-for-byte
+BYTE_CONCAT_EXTENSIONS = {".ts", ".m2ts", ".mts"}
+MERGE_COPY_BUFFER = 4 * 1024 * 1024
+# Linux sendfile() accepts regular files on both ends: the merge copy never enters user space
+SENDFILE_MERGE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+
 
 class Downloader:
     """Downloader with support for parallel chunked downloads."""
@@ -24,7 +67,8 @@ class Downloader:
         
         Args:
             ffmpeg_handler: Inject existing FFmpegHandler or None to create new one.
-            max_workers: Max concurrent connections for parallel downloads.
+            max_workers: Max concurrent connections for parallel downloads
+                         (AUTO_WORKERS = measure per host on first download).
         """
         if ffmpeg_handler:
             self.ffmpeg_handler = ffmpeg_handler
@@ -33,16 +77,494 @@ class Downloader:
             self.ffmpeg_handler = FFmpegHandler()
         
         self.max_workers = max_workers
+        self._session = None
+        # Guards the lazily built session and the per-host worker counts; one Downloader
+        # serves several batch groups at once
+        self._session_lock = threading.Lock()
+        self._auto_workers_cache = {}  # host -> measured worker count
+        self._tuning = {}  # host -> (workers, bytes/s, step, held samples, settling) of the last fetch
+        self._tuning_lock = threading.Lock()
+        self._http2_client = None  # httpx.Client, False if httpx[http2] is not installed
+        self._range_errors = (requests.RequestException, OSError)
+        self._http2_lock = threading.Lock()
+        # url -> {"users", "lock", probe results} while batches on url run: its segments
+        # share one range check and one duration probe
+        self._source_scopes = {}
+        self._source_lock = threading.Lock()
+
+    def set_max_workers(self, max_workers: int):
+        """Change the connection limit (AUTO_WORKERS re-enables measuring)."""
+        with self._tuning_lock:
+            self.max_workers = max_workers
+            self._auto_workers_cache.clear()
+            self._tuning.clear()
+        with self._session_lock:
+            if self._session is not None:
+                # Pool size follows max_workers; rebuild on next use
+                self._session.close()
+                self._session = None
 
     def _safe_path(self, path) -> str:
         """Convert to safe absolute path string."""
         return str(Path(path).resolve())
 
     def _get_temp_dir(self) -> Path:
-        """Get temporary directory for video chunks in cache folder."""
-        temp_dir = CACHE_DIR / f"chunks_{os.getpid()}"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        return temp_dir
+        """Get a fresh temporary directory for video chunks in cache folder (one per download)."""
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=f"chunks_{os.getpid()}_", dir=CACHE_DIR))
+
+    def _get_session(self) -> requests.Session:
+        """Get pooled HTTP session sized for parallel range requests."""
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def _build_session(self) -> requests.Session:
+        """Create the HTTP session with a pool of max_workers connections and retries."""
+        session = requests.Session()
+        pool_size = max(self.max_workers, MAX_AUTO_WORKERS if self.max_workers == AUTO_WORKERS else 1)
+        # Retry dropped connections and transient gateway errors instead of failing the chunk
+        retries = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_http2_client(self):
+        """
+        Get a shared HTTP/2 client for https range requests (optional httpx[http2]).
+        All range threads multiplex over one connection instead of one TLS handshake each.
+        """
+        with self._http2_lock:
+            if self._http2_client is None:
+                try:
+                    import httpx
+                    import h2  # noqa: F401 - required by httpx for http2=True
+                except ImportError:
+                    self._http2_client = False
+                else:
+                    self._range_errors = self._range_errors + (httpx.HTTPError,)
+                    self._http2_client = httpx.Client(
+                        http2=True,
+                        timeout=httpx.Timeout(30, connect=5),
+                        follow_redirects=True
+                    )
+            return self._http2_client or None
+
+    @contextmanager
+    def _open_range(self, url: str, first: int, last: int):
+        """Stream bytes [first, last] of url; yields (status code, chunk iterator)."""
+        headers = {"Range": f"bytes={first}-{last}", "Accept-Encoding": "identity"}
+        client = self._get_http2_client() if url.startswith("https://") else None
+        if client is not None:
+            with client.stream("GET", url, headers=headers) as response:
+                yield response.status_code, response.iter_raw(RANGE_COPY_BUFFER)
+        else:
+            with self._get_session().get(url, headers=headers, stream=True, timeout=(5, 30)) as response:
+                yield response.status_code, response.iter_content(RANGE_COPY_BUFFER)
+
+    def _measure_connection(self, url: str) -> Tuple[int, float]:
+        """Fetch the first AUTO_PROBE_BYTES of url; return (bytes received, seconds)."""
+        headers = {"Range": f"bytes=0-{AUTO_PROBE_BYTES - 1}", "Accept-Encoding": "identity"}
+        started = time.perf_counter()
+        received = 0
+        with self._get_session().get(url, headers=headers, stream=True, timeout=(5, 15)) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(64 * 1024):
+                received += len(chunk)
+                if received >= AUTO_PROBE_BYTES:
+                    break
+        return received, time.perf_counter() - started
+
+    def _auto_workers(self, url: str) -> int:
+        """Pick a connection count from a two-connection throughput probe."""
+        if not url.startswith(("http://", "https://")):
+            return DEFAULT_AUTO_WORKERS
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                samples = list(executor.map(self._measure_connection, [url, url]))
+        except (requests.RequestException, OSError) as e:
+            log.warning(f"Connection probe failed, using {DEFAULT_AUTO_WORKERS} connections: {e}")
+            return DEFAULT_AUTO_WORKERS
+        
+        received = sum(size for size, _ in samples)
+        elapsed = max(seconds for _, seconds in samples)
+        if received <= 0 or elapsed <= 0:
+            return DEFAULT_AUTO_WORKERS
+        
+        mbps = received * 8 / elapsed / 1_000_000
+        workers = next(count for limit, count in SPEED_PROFILES if mbps < limit)
+        log.info(f"Measured {mbps:.0f} Mbps, using {workers} connections")
+        return workers
+
+    def _resolve_workers(self, url: str) -> int:
+        """Get connection count for url, measuring once per host in auto mode."""
+        if self.max_workers != AUTO_WORKERS:
+            return self.max_workers
+        host = urlsplit(url).netloc
+        with self._tuning_lock:
+            workers = self._auto_workers_cache.get(host)
+        if workers is None:
+            # Measured outside the lock; concurrent first downloads may both probe, one result is kept
+            measured = self._auto_workers(url)
+            with self._tuning_lock:
+                workers = self._auto_workers_cache.setdefault(host, measured)
+        return workers
+
+    def _record_throughput(self, url: str, workers: int, nbytes: int, seconds: float):
+        """
+        Hill-climb the auto worker count for url's host. A step that raised throughput
+        by more than TUNING_TOLERANCE is followed by another in the same direction; a step
+        that lowered it is undone and the count settles there. While throughput stays
+        within the tolerance the count is held, and only re-probed after a drop or every
+        TUNING_PROBE_EVERY samples.
+        """
+        if self.max_workers != AUTO_WORKERS or seconds <= 0:
+            return
+        host = urlsplit(url).netloc
+        rate = nbytes / seconds
+        with self._tuning_lock:
+            last = self._tuning.get(host)
+            if last is None:
+                step, held, settling, target = 1, 0, False, workers + 1
+            else:
+                last_workers, last_rate, step, held, settling = last
+                moved = workers != last_workers
+                change = (rate - last_rate) / last_rate if last_rate > 0 else 0.0
+                if moved and settling:
+                    # Back on the count before a bad step: stay there
+                    held, settling, target = 0, False, workers
+                elif moved and change < -TUNING_TOLERANCE:
+                    # The last step hurt: undo it and settle
+                    step, held, settling, target = -step, 0, True, last_workers
+                elif moved and change > TUNING_TOLERANCE:
+                    held, target = 0, workers + step
+                elif not moved and change < -TUNING_TOLERANCE:
+                    # Slower at the same count: the link changed, look for a better one
+                    held, target = 0, workers + step
+                else:
+                    held += 1
+                    target = workers
+                    if held >= TUNING_PROBE_EVERY:
+                        held, target = 0, workers + step
+            self._tuning[host] = (workers, rate, step, held, settling)
+            self._auto_workers_cache[host] = max(1, min(MAX_AUTO_WORKERS, target))
+
+    @contextmanager
+    def _source_scope(self, url: str):
+        """Share probes of url between everything downloading from it inside the block."""
+        with self._source_lock:
+            scope = self._source_scopes.setdefault(url, {"users": 0, "lock": threading.Lock()})
+            scope["users"] += 1
+        try:
+            yield
+        finally:
+            with self._source_lock:
+                scope["users"] -= 1
+                if not scope["users"]:
+                    # Scoped rather than kept: a URL such as a TDL serve link can point at another file later
+                    del self._source_scopes[url]
+
+    def _cached_probe(self, url: str, kind: str, probe):
+        """Run probe(url) once per kind while url is in a _source_scope (uncached outside one)."""
+        with self._source_lock:
+            scope = self._source_scopes.get(url)
+        if scope is None:
+            return probe(url)
+        # Concurrent segments wait for the first probe instead of sending their own
+        with scope["lock"]:
+            if kind not in scope:
+                scope[kind] = probe(url)
+            return scope[kind]
+
+    def _probe_range_support(self, url: str) -> int:
+        """Return Content-Length if the server supports byte ranges, else 0."""
+        return self._cached_probe(url, "size", self._head_range_size)
+
+    def _head_range_size(self, url: str) -> int:
+        """HEAD url: Content-Length if the server supports byte ranges, else 0."""
+        if not url.startswith(("http://", "https://")):
+            return 0
+        try:
+            response = self._get_session().head(url, allow_redirects=True, timeout=(5, 15))
+            if response.status_code >= 400:
+                return 0
+            if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+                return 0
+            return int(response.headers.get("Content-Length", 0) or 0)
+        except (requests.RequestException, ValueError):
+            return 0
+
+    def supports_ranges(self, url: str) -> bool:
+        """Check if an http(s) URL can be read with seeking (e.g. directly by ffmpeg)."""
+        return self._probe_range_support(url) > 0
+
+    def _range_fetch_size(self, url: str, start_time: float, end_time: float) -> int:
+        """
+        Decide whether a segment is best fetched as whole-file byte ranges.
+        
+        Returns:
+            Source size in bytes if range fetching should be used, else 0
+        """
+        size = self._probe_range_support(url)
+        if not size:
+            return 0
+        
+        duration = self._cached_probe(url, "duration", self.ffmpeg_handler.get_duration)
+        if duration <= 0 or (end_time - start_time) / duration < RANGE_FETCH_MIN_COVERAGE:
+            return 0
+        return size
+
+    def _download_range(self, url: str, first: int, last: int, output_path: str) -> bool:
+        """Download bytes [first, last] of url straight into output_path at offset first."""
+        try:
+            with self._open_range(url, first, last) as (status_code, chunks):
+                if status_code != 206:
+                    log.error(f"Range {first}-{last} not honored (HTTP {status_code})")
+                    return False
+                # Own handle per range: positional writes without sharing a file offset
+                with open(output_path, "r+b") as f:
+                    f.seek(first)
+                    for chunk in chunks:
+                        f.write(chunk)
+                    written = f.tell() - first
+            return written == last - first + 1
+        except self._range_errors as e:
+            log.error(f"Range download error: {e}")
+            return False
+
+    def _fetch_range_bytes(self, url: str, first: int, last: int) -> Optional[bytes]:
+        """Download bytes [first, last] of url into memory (None on failure)."""
+        try:
+            with self._open_range(url, first, last) as (status_code, chunks):
+                data = b"".join(chunks) if status_code == 206 else b""
+            if len(data) != last - first + 1:
+                log.error(f"Range {first}-{last} not honored (HTTP {status_code})")
+                return None
+            return data
+        except self._range_errors as e:
+            log.error(f"Range download error: {e}")
+            return None
+
+    def _is_pipe_friendly(self, head: bytes) -> bool:
+        """
+        Check if a source can be demuxed from a non-seekable pipe.
+        MP4/MOV only qualifies when its moov index comes before the media data.
+        """
+        if head[4:8] != b"ftyp":
+            return True  # TS, Matroska, FLV... are streamable containers
+        
+        offset = 0
+        while offset + 8 <= len(head):
+            box_size = int.from_bytes(head[offset:offset + 4], "big")
+            box_type = head[offset + 4:offset + 8]
+            if box_type == b"moov":
+                return True
+            if box_type == b"mdat":
+                return False
+            if box_size == 1 and offset + 16 <= len(head):
+                box_size = int.from_bytes(head[offset + 8:offset + 16], "big")
+            if box_size < 8:
+                return False
+            offset += box_size
+        # Index position unknown within the probe: assume it is at the end
+        return False
+
+    def _stream_ranges_to_ffmpeg(self, url: str, size: int, start_time: float,
+                                 end_time: float, output_path: str, workers: int) -> bool:
+        """
+        Fetch byte ranges in parallel and feed them in order to ffmpeg's stdin,
+        which cuts the segment on the fly. Nothing is staged on disk.
+        """
+        ranges = self._plan_ranges(size, workers)
+        log.info(f"Streaming {size / (1024 * 1024):.1f} MB in {len(ranges)} ranges ({workers} connections)...")
+        
+        cmd = [
+            self.ffmpeg_handler.ffmpeg,
+            "-hide_banner", "-v", "warning",
+            "-y",
+            "-i", "pipe:0",
+            "-ss", str(start_time),
+            "-t", str(end_time - start_time),
+            "-c", "copy",
+            output_path
+        ]
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            **NEW_GROUP_KWARGS
+        )
+        track(process)
+        
+        stderr_head = []
+        
+        def read_stderr():
+            """Keep the head of stderr, drain the rest."""
+            stderr_head.append(process.stderr.read(MAX_STDERR_BYTES))
+            while process.stderr.read(65536):
+                pass
+        
+        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+        stderr_thread.start()
+        
+        # Sliding window: at most workers + 2 ranges fetched or buffered at once
+        window = workers + 2
+        pending = deque()
+        next_range = 0
+        fed_all = True
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while pending or next_range < len(ranges):
+                    while next_range < len(ranges) and len(pending) < window:
+                        first, last = ranges[next_range]
+                        pending.append(executor.submit(self._fetch_range_bytes, url, first, last))
+                        next_range += 1
+                    
+                    data = pending.popleft().result()
+                    if data is None:
+                        fed_all = False
+                        break
+                    try:
+                        process.stdin.write(data)
+                    except OSError:
+                        # Broken pipe: ffmpeg stops reading once the -t window is written
+                        break
+                
+                for future in pending:
+                    future.cancel()
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            if not fed_all:
+                process.kill()
+            process.wait()
+            stderr_thread.join(timeout=1)
+            untrack(process)
+        
+        if not fed_all:
+            return False
+        if process.returncode != 0:
+            details = stderr_head[0].decode('utf-8', errors='replace').strip() if stderr_head else ""
+            log.error("Streamed cut failed", details=details[:200] or None)
+            return False
+        return True
+
+    def _plan_ranges(self, size: int, workers: int) -> List[Tuple[int, int]]:
+        """Split [0, size) into contiguous byte ranges (at least one per worker)."""
+        part_size = min(RANGE_PART_SIZE, -(-size // workers))
+        return [(first, min(first + part_size, size) - 1) for first in range(0, size, part_size)]
+
+    def _preallocate(self, output_path: str, size: int):
+        """Create output_path at its final size so ranges can be written in place."""
+        with open(output_path, "wb") as f:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    # Reserve contiguous blocks up front instead of growing the file
+                    os.posix_fallocate(f.fileno(), 0, size)
+                    return
+                except OSError:
+                    pass
+            f.truncate(size)
+
+    def _fetch_by_ranges(self, url: str, size: int, output_path: str, workers: int) -> bool:
+        """
+        Download a whole file as parallel byte ranges.
+        Each range is written at its own offset in a preallocated file, so parts
+        never touch disk twice and can land in any order.
+        """
+        ranges = self._plan_ranges(size, workers)
+        total = len(ranges)
+        log.info(f"Fetching {size / (1024 * 1024):.1f} MB in {total} ranges ({workers} connections)...")
+        
+        try:
+            self._preallocate(output_path, size)
+        except OSError as e:
+            log.error(f"Cannot create {output_path}: {e}")
+            return False
+        
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._download_range, url, first, last, output_path)
+                       for first, last in ranges]
+            for future in as_completed(futures):
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    log.error(f"Range error: {e}")
+                    ok = False
+                
+                if not ok:
+                    for pending in futures:
+                        pending.cancel()
+                    return False
+                
+                completed += 1
+                log.step(completed, total, "Range written")
+        
+        return True
+
+    def _download_segment_via_ranges(self, url: str, size: int, start_time: float,
+                                     end_time: float, output_path: str, workers: int) -> bool:
+        """Fetch source with parallel range requests, then cut the segment locally."""
+        head = self._fetch_range_bytes(url, 0, min(STREAM_PROBE_BYTES, size) - 1)
+        if head is not None and self._is_pipe_friendly(head):
+            try:
+                return self._stream_ranges_to_ffmpeg(url, size, start_time, end_time, output_path, workers)
+            except (subprocess.SubprocessError, OSError) as e:
+                log.error(f"Range download failed: {e}")
+                return False
+        
+        # Index at the end of the file: ffmpeg needs a seekable local copy
+        temp_dir = self._get_temp_dir()
+        source_file = str(temp_dir / "source.bin")
+        try:
+            if not self._fetch_by_ranges(url, size, source_file, workers):
+                return False
+            self.ffmpeg_handler.split_video(source_file, start_time, end_time, output_path)
+            return True
+        except Exception as e:
+            log.error(f"Range download failed: {e}")
+            return False
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _run_capped(self, cmd: List[str], max_err: int = MAX_STDERR_BYTES) -> Tuple[int, str]:
+        """
+        Run a command whose stdout is unused, keeping only the head of stderr.
+        
+        Returns:
+            Tuple of (return code, first max_err bytes of stderr decoded)
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            **NEW_GROUP_KWARGS
+        )
+        # Tracked so an interrupted batch doesn't leave ffmpegs running
+        track(process)
+        try:
+            head = process.stderr.read(max_err)
+            # Keep draining so a chatty process never blocks on a full pipe
+            while process.stderr.read(65536):
+                pass
+        finally:
+            process.stderr.close()
+            process.wait()
+            untrack(process)
+        return process.returncode, head.decode('utf-8', errors='replace')
 
     def smart_download(self, url: str, output_name: str) -> bool:
         """
@@ -61,20 +583,14 @@ class Downloader:
             safe_output
         ]
         try:
-            result = subprocess.run(
-                cmd, 
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            if result.returncode != 0:
-                error = result.stderr.strip() if result.stderr else f"Exit code: {result.returncode}"
+            returncode, stderr = self._run_capped(cmd)
+            if returncode != 0:
+                error = stderr.strip() or f"Exit code: {returncode}"
                 log.error("Download failed", details=error)
                 return False
             log.success(f"Downloaded: {output_name}")
             return True
-        except subprocess.SubprocessError as e:
+        except (subprocess.SubprocessError, OSError) as e:
             log.error(f"FFmpeg download failed: {e}")
             return False
 
@@ -83,52 +599,82 @@ class Downloader:
         cmd = [
             self.ffmpeg_handler.ffmpeg,
             "-hide_banner", "-v", "warning",
-            "-y",
+            "-y"
+        ]
+        if Path(output_path).suffix.lower() in BYTE_CONCAT_EXTENSIONS:
+            # Keep source timestamps so byte-joined chunks play back continuously
+            cmd.append("-copyts")
+        cmd.extend([
             "-ss", str(start_time),
             "-i", url,
             "-t", str(duration),
             "-c", "copy",
             output_path
-        ]
+        ])
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            if result.returncode != 0:
-                log.error(f"Chunk {start_time:.1f}s failed", 
-                         details=result.stderr[:200] if result.stderr else None)
+            returncode, stderr = self._run_capped(cmd)
+            if returncode != 0:
+                log.error(f"Chunk {start_time:.1f}s failed", details=stderr[:200] or None)
                 return False
             return True
-        except subprocess.SubprocessError as e:
+        except (subprocess.SubprocessError, OSError) as e:
             log.error(f"Chunk download error: {e}")
             return False
 
-    def _merge_chunks(self, chunk_files: List[str], output_path: str) -> bool:
-        """Merge multiple chunks into one file using ffmpeg concat."""
-        list_file = CACHE_DIR / f"concat_list_{os.getpid()}.txt"
+    def _concat_bytes(self, chunk_files: List[str], output_path: str) -> bool:
+        """Join MPEG-TS chunks by plain file copy, no ffmpeg process needed."""
         try:
-            with open(list_file, "w", encoding="utf-8") as f:
+            with open(output_path, "wb") as out:
                 for chunk in chunk_files:
-                    safe_path = self._safe_path(chunk).replace("\\", "/")
-                    f.write(f"file '{safe_path}'\n")
-            
+                    with open(chunk, "rb") as src:
+                        if hasattr(os, "posix_fadvise"):
+                            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                        self._append_file(src, out)
+            return True
+        except OSError as e:
+            log.error(f"Merge error: {e}")
+            return False
+
+    def _append_file(self, src, out):
+        """Append all of src to out, in-kernel with sendfile where supported."""
+        offset = 0
+        if SENDFILE_MERGE:
+            size = os.fstat(src.fileno()).st_size
+            out.flush()
+            try:
+                while offset < size:
+                    sent = os.sendfile(out.fileno(), src.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except OSError:
+                pass  # e.g. a filesystem without sendfile support; copy the rest below
+            if offset >= size:
+                return
+            src.seek(offset)
+        shutil.copyfileobj(src, out, MERGE_COPY_BUFFER)
+
+    def _merge_chunks(self, chunk_files: List[str], output_path: str) -> bool:
+        """Merge multiple chunks into one file using ffmpeg concat (list piped on stdin)."""
+        if Path(output_path).suffix.lower() in BYTE_CONCAT_EXTENSIONS:
+            return self._concat_bytes(chunk_files, output_path)
+        
+        try:
             cmd = [
                 self.ffmpeg_handler.ffmpeg,
                 "-hide_banner", "-v", "warning",
                 "-y",
                 "-f", "concat",
                 "-safe", "0",
-                "-i", str(list_file),
+                "-protocol_whitelist", "file,pipe",
+                "-i", "pipe:0",
                 "-c", "copy",
                 output_path
             ]
             
             result = subprocess.run(
                 cmd,
+                input=self.ffmpeg_handler.concat_list(chunk_files),
                 capture_output=True,
                 text=True,
                 encoding='utf-8',
@@ -142,19 +688,35 @@ class Downloader:
         except Exception as e:
             log.error(f"Merge error: {e}")
             return False
-        finally:
-            if list_file.exists():
-                list_file.unlink()
 
-    def download_segment_parallel(self, url: str, start_time: float, end_time: float, output_name: str) -> bool:
+    def download_segment_parallel(self, url: str, start_time: float, end_time: float, output_name: str,
+                                  max_workers: Optional[int] = None) -> bool:
         """
         Download a segment by splitting it into multiple chunks and downloading in parallel.
+        
+        Args:
+            max_workers: Connections for this segment (default: self.max_workers).
         """
+        resolved = self._resolve_workers(url)
+        workers = max_workers or resolved
         total_duration = end_time - start_time
         safe_output = self._safe_path(output_name)
         
-        # If duration is very short or max_workers is 1, do single download
-        if total_duration < 30 or self.max_workers <= 1:
+        # Range-capable HTTP servers: fetch bytes in parallel instead of N ffmpeg seeks
+        if workers > 1:
+            size = self._range_fetch_size(url, start_time, end_time)
+            if size:
+                started = time.perf_counter()
+                if self._download_segment_via_ranges(url, size, start_time, end_time, safe_output, workers):
+                    # Only full-width fetches say anything about the host's best connection count
+                    if workers == resolved:
+                        self._record_throughput(url, workers, size, time.perf_counter() - started)
+                    log.success(f"Created: {output_name}")
+                    return True
+                log.warning("Range download failed, falling back to FFmpeg seeking...")
+        
+        # If duration is very short or workers is 1, do single download
+        if total_duration < 30 or workers <= 1:
             log.info(f"Short segment, single download: {output_name}")
             try:
                 self.ffmpeg_handler.download_segment(url, start_time, end_time, output_name)
@@ -164,26 +726,28 @@ class Downloader:
                 return False
         
         # Calculate chunk size
-        chunk_duration = total_duration / self.max_workers
+        chunk_duration = total_duration / workers
         
         # Use application cache directory for temp files
         temp_dir = self._get_temp_dir()
         
         try:
-            # Prepare chunk tasks
+            # Prepare chunk tasks (TS outputs get TS chunks so they can be byte-joined)
+            suffix = Path(safe_output).suffix.lower()
+            chunk_ext = suffix if suffix in BYTE_CONCAT_EXTENSIONS else ".mp4"
             chunks = []
-            for i in range(self.max_workers):
+            for i in range(workers):
                 chunk_start = start_time + (i * chunk_duration)
-                chunk_file = str(temp_dir / f"chunk_{i:03d}.mp4")
+                chunk_file = str(temp_dir / f"chunk_{i:03d}{chunk_ext}")
                 chunks.append((chunk_start, chunk_duration, chunk_file))
             
-            log.info(f"Splitting into {self.max_workers} parallel downloads...")
+            log.info(f"Splitting into {workers} parallel downloads...")
             
             # Download chunks in parallel
             chunk_files = []
             success = True
             
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
                 futures = {}
                 for i, (chunk_start, chunk_dur, chunk_file) in enumerate(chunks):
                     future = executor.submit(self._download_chunk, url, chunk_start, chunk_dur, chunk_file)
@@ -194,15 +758,15 @@ class Downloader:
                     try:
                         if future.result():
                             chunk_files.append((idx, chunk_file))
-                            log.step(idx + 1, self.max_workers, f"Chunk completed")
+                            log.step(idx + 1, workers, f"Chunk completed")
                         else:
                             success = False
-                            log.error(f"Chunk {idx + 1}/{self.max_workers} failed")
+                            log.error(f"Chunk {idx + 1}/{workers} failed")
                     except Exception as e:
                         log.error(f"Chunk {idx} error: {e}")
                         success = False
             
-            if not success or len(chunk_files) != self.max_workers:
+            if not success or len(chunk_files) != workers:
                 log.error("Not all chunks downloaded successfully")
                 return False
             
@@ -223,23 +787,173 @@ class Downloader:
             if temp_dir.exists():
                 shutil.rmtree(temp_dir, ignore_errors=True)
 
+    def _single_pass_applies(self, url: str, segments: List[Tuple[float, float, str]]) -> bool:
+        """Check if one sequential read covering all segments beats per-segment seeking."""
+        if len(segments) < 2 or self._probe_range_support(url):
+            return False
+        span = max(end for _, end, _ in segments) - min(start for start, _, _ in segments)
+        wanted = sum(end - start for start, end, _ in segments)
+        # Copying the gaps between segments to disk must not cost more than the segments themselves
+        return span > 0 and wanted / span >= RANGE_FETCH_MIN_COVERAGE
+
+    def _download_segments_single_pass(
+        self, 
+        url: str, 
+        segments: List[Tuple[float, float, str]]
+    ) -> List[Tuple[str, bool]]:
+        """
+        Read the URL once, up to the last segment's end, into a temp file and cut every
+        segment from that copy with input-side seeking (keyframe starts, as download_segment).
+        A source without byte ranges streams from its start whatever the seek, so the one
+        read costs no more than fetching the last segment alone.
+        
+        Returns:
+            List of (output, success), or an empty list if the read failed.
+        """
+        last_end = max(end for _, end, _ in segments)
+        temp_dir = self._get_temp_dir()
+        source = temp_dir / f"source{Path(segments[0][2]).suffix or '.mp4'}"
+        cmd = [
+            self.ffmpeg_handler.ffmpeg,
+            "-hide_banner", "-v", "warning",
+            "-y",
+            "-i", url,
+            "-to", str(last_end),
+            "-c", "copy",
+            str(source)
+        ]
+        
+        log.info(f"Reading source once for {len(segments)} segments...")
+        try:
+            try:
+                returncode, stderr = self._run_capped(cmd)
+            except (subprocess.SubprocessError, OSError) as e:
+                log.warning(f"Single-pass download failed: {e}")
+                return []
+            
+            if returncode != 0 or not source.exists():
+                log.warning(f"Single-pass download failed: {stderr.strip()[:200] or f'Exit code: {returncode}'}")
+                return []
+            
+            return [
+                (output, self._cut_local(str(source), start, end, output))
+                for start, end, output in segments
+            ]
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _cut_local(self, source: str, start_time: float, end_time: float, output_path: str) -> bool:
+        """Stream-copy one segment out of a local file, seeking on the input."""
+        cmd = [
+            self.ffmpeg_handler.ffmpeg,
+            "-hide_banner", "-v", "warning",
+            "-y",
+            "-ss", str(start_time),
+            "-i", source,
+            "-t", str(end_time - start_time),
+            "-c", "copy",
+            self._safe_path(output_path)
+        ]
+        try:
+            returncode, stderr = self._run_capped(cmd)
+        except (subprocess.SubprocessError, OSError) as e:
+            log.error(f"Segment cut failed: {e}")
+            return False
+        if returncode != 0:
+            log.error(f"Segment {start_time:.1f}s failed", details=stderr[:200] or None)
+            return False
+        return os.path.exists(output_path)
+
     def download_segment(self, url: str, start_time: float, end_time: float, output_name: str) -> bool:
         """Download a specific segment from URL using parallel chunked download."""
         return self.download_segment_parallel(url, start_time, end_time, output_name)
 
+    def iter_completed_segments(
+        self, 
+        url: str, 
+        segments: List[Tuple[float, float, str]],
+        share: int = 1
+    ) -> Iterator[Tuple[int, str, bool]]:
+        """
+        Download multiple segments concurrently, yielding (index, output, success)
+        as each one finishes so callers can act on finished files right away.
+        Connections are divided between the concurrent segments so the total
+        fan-out stays at max_workers.
+        
+        Args:
+            share: Number of batches running at once on this Downloader; each gets
+                   1/share of the connection budget, so together they stay within it
+        """
+        if not segments:
+            return
+        # The segments share one range check and duration probe of url
+        with self._source_scope(url):
+            yield from self._iter_segments(url, segments, share)
+
+    def _iter_segments(
+        self, 
+        url: str, 
+        segments: List[Tuple[float, float, str]],
+        share: int
+    ) -> Iterator[Tuple[int, str, bool]]:
+        """Body of iter_completed_segments, run inside the url's probe scope."""
+        # Non-range sources: one connection and demux for all segments when they sit close together
+        if self._single_pass_applies(url, segments):
+            results = self._download_segments_single_pass(url, segments)
+            if results:
+                for i, (output, success) in enumerate(results):
+                    yield i, output, success
+                return
+            log.warning("Falling back to per-segment downloads...")
+        
+        total_workers = max(1, self._resolve_workers(url) // max(1, share))
+        # Segment fetches wait on the network, so the CPU count must not serialize them
+        cpu_cap = max(MIN_CONCURRENT_SEGMENTS, (os.cpu_count() or 2) // 2)
+        concurrent = max(1, min(len(segments), cpu_cap, total_workers))
+        per_segment = max(1, total_workers // concurrent)
+        
+        if concurrent == 1:
+            for i, (start, end, output) in enumerate(segments):
+                log.section(f"Segment {i+1}/{len(segments)}: {output}")
+                yield i, output, self.download_segment_parallel(url, start, end, output, total_workers)
+            return
+        
+        log.info(f"Downloading {len(segments)} segments, {concurrent} at a time ({per_segment} connections each)...")
+        
+        # Longest segments first, so a long one never starts last and stretches the batch
+        order = sorted(range(len(segments)), key=lambda i: segments[i][0] - segments[i][1])
+        with ThreadPoolExecutor(max_workers=concurrent) as executor:
+            futures = {}
+            for i in order:
+                start, end, output = segments[i]
+                futures[executor.submit(self.download_segment_parallel, url, start, end, output, per_segment)] = i
+            for future in as_completed(futures):
+                idx = futures[future]
+                output = segments[idx][2]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    log.error(f"Segment {idx + 1} error: {e}")
+                    success = False
+                log.step(idx + 1, len(segments), f"{'Done' if success else 'Failed'}: {output}")
+                yield idx, output, success
+
     def batch_download_segments(
         self, 
         url: str, 
-        segments: List[Tuple[float, float, str]]
+        segments: List[Tuple[float, float, str]],
+        share: int = 1
     ) -> List[Tuple[str, bool]]:
         """
-        Download multiple segments sequentially (each segment uses parallel chunk download).
-        """
-        results = []
+        Download multiple segments concurrently.
         
-        for i, (start, end, output) in enumerate(segments):
-            log.section(f"Segment {i+1}/{len(segments)}: {output}")
-            success = self.download_segment_parallel(url, start, end, output)
-            results.append((output, success))
+        Args:
+            share: Batches running at once on this Downloader (see iter_completed_segments)
         
+        Returns:
+            List of (output, success) in the order of segments
+        """
+        results: List[Optional[Tuple[str, bool]]] = [None] * len(segments)
+        for idx, output, success in self.iter_completed_segments(url, segments, share):
+            results[idx] = (output, success)
         return results
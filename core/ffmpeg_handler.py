@@ -2,15 +2,106 @@
 FFmpeg Handler with improved error handling, progress tracking, and colored logging.
 """
 import subprocess
+import os
 import json
 import re
 import time
+import codecs
+import shutil
+import selectors
 import threading
 from pathlib import Path
-from typing import Optional, Callable, Tuple
-from .config import get_binary_path, get_env, get_compression_settings
+from typing import Optional, Callable, Tuple, List
+from .config import get_binary_path, get_env, get_compression_settings, CACHE_DIR
 from utils.logger import log
 
+# Optional C-backed JSON parser for ffprobe output (raises a json.JSONDecodeError subclass)
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _parse_out_time(value: str) -> float:
+    """out_time_ms is reported in microseconds despite its name."""
+    return int(value) / 1_000_000.0
+
+
+def _parse_speed(value: str) -> float:
+    """Parse '1.23x' (raises ValueError for 'N/A')."""
+    return float(value.rstrip("x"))
+
+
+# ffmpeg binary path -> hardware encoders it was built with, shared by all handlers
+_ENCODER_CACHE = {}
+_ENCODER_LOCK = threading.Lock()
+# Survives restarts; entries are tied to the binary's mtime and size
+ENCODER_CACHE_FILE = CACHE_DIR / "encoders.json"
+
+# Packets the muxer may hold per stream while an encoder (often a GPU one) warms up
+MAX_MUXING_QUEUE_SIZE = 4096
+
+# Seconds a batch output may fall short of its source and still count as finished
+OUTPUT_DURATION_SLACK = 0.5
+
+# Subtitle codecs FFmpeg converts to MP4's mov_text when it picks streams on its own
+TEXT_SUBTITLE_CODECS = {"subrip", "srt", "ass", "ssa", "mov_text", "webvtt", "text"}
+# Score bonus FFmpeg's automatic stream selection gives streams flagged as default
+DEFAULT_STREAM_BONUS = 5000000
+
+
+def _binary_stamp(path: str) -> Optional[list]:
+    """Identify a binary version by (mtime_ns, size); bare names are looked up on PATH."""
+    try:
+        st = os.stat(shutil.which(path) or path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load_persisted_encoders(ffmpeg: str) -> Optional[list]:
+    """Read detection results saved by a previous run for this exact binary."""
+    stamp = _binary_stamp(ffmpeg)
+    if stamp is None:
+        return None
+    try:
+        with open(ENCODER_CACHE_FILE, "r", encoding="utf-8") as f:
+            entry = json.load(f).get(ffmpeg)
+    except (OSError, ValueError):
+        return None
+    if isinstance(entry, dict) and entry.get("stamp") == stamp:
+        return entry.get("encoders")
+    return None
+
+
+def _persist_encoders(ffmpeg: str, encoders: list):
+    """Save detection results for the next run (best effort)."""
+    stamp = _binary_stamp(ffmpeg)
+    if stamp is None:
+        return
+    try:
+        with open(ENCODER_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+    data[ffmpeg] = {"stamp": stamp, "encoders": encoders}
+    try:
+        tmp_file = ENCODER_CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_file, ENCODER_CACHE_FILE)
+    except OSError:
+        pass
+
+
+# -progress key -> (state slot, parser); a "progress=" line closes each report block
+_PROGRESS_FIELDS = {
+    "out_time_ms": ("current_time", _parse_out_time),
+    "speed": ("speed", _parse_speed),
+}
+
 
 class FFmpegHandler:
     """Handler for FFmpeg operations with progress tracking and error handling."""
@@ -25,17 +116,34 @@ class FFmpegHandler:
     def __init__(self):
         self.ffmpeg = get_binary_path("ffmpeg")
         self.ffprobe = get_binary_path("ffprobe")
-        self._detected_encoders = None
+        self._probe_cache = {}  # (path, mtime_ns, size) -> ffprobe JSON
+        # Config resolved once; the settings menu updates these attributes directly
+        self.override_encoding = get_env("OVERRIDE_ENCODING", "")
+        self.compression_level = get_env("COMPRESSION_LEVEL", "medium")
 
     def _safe_path(self, path) -> str:
-        """Convert path to safe absolute path string for FFmpeg on Windows."""
+        """Convert path to safe absolute path string for FFmpeg on Windows (URLs pass through)."""
+        path = str(path)
+        if "://" in path:
+            return path
         return str(Path(path).resolve())
 
+    def concat_list(self, paths) -> str:
+        """Build a concat demuxer list (absolute paths, quotes escaped) to feed on stdin."""
+        lines = []
+        for path in paths:
+            safe_path = self._safe_path(path).replace("\\", "/").replace("'", "'\\''")
+            lines.append(f"file '{safe_path}'\n")
+        return "".join(lines)
+
     def _run_ffmpeg(self, cmd: list, progress_callback: Optional[Callable] = None, 
-                    total_duration: float = 0.0) -> Tuple[bool, str]:
+                    total_duration: float = 0.0, input_text: Optional[str] = None) -> Tuple[bool, str]:
         """
         Run FFmpeg command with proper error handling and optional progress tracking.
         
+        Args:
+            input_text: Data written to FFmpeg's stdin (e.g. a concat list read via pipe:0).
+        
         Returns:
             Tuple of (success, error_message)
         """
@@ -56,11 +164,12 @@ class FFmpegHandler:
                     except ValueError:
                         progress_cmd = [progress_cmd[0], "-progress", "pipe:1"] + progress_cmd[1:]
                 
-                return self._run_with_progress(progress_cmd, progress_callback, total_duration)
+                return self._run_with_progress(progress_cmd, progress_callback, total_duration, input_text)
             else:
                 # Standard run with error capture
                 result = subprocess.run(
                     cmd,
+                    input=input_text,
                     capture_output=True,
                     text=True,
                     encoding='utf-8',
@@ -79,12 +188,13 @@ class FFmpegHandler:
             return False, f"Unexpected error: {e}"
 
     def _run_with_progress(self, cmd: list, callback: Callable, 
-                           total_duration: float) -> Tuple[bool, str]:
+                           total_duration: float, input_text: Optional[str] = None) -> Tuple[bool, str]:
         """Run FFmpeg with progress parsing and callback."""
         start_time = time.time()
         
         process = subprocess.Popen(
             cmd,
+            stdin=subprocess.PIPE if input_text is not None else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -92,43 +202,36 @@ class FFmpegHandler:
             errors='replace'
         )
         
-        current_time = 0.0
-        speed = 0.0
-        
-        def read_stderr():
-            """Read stderr in background to prevent blocking."""
-            try:
-                process.stderr.read()
-            except:
-                pass
+        state = {"current_time": 0.0, "speed": 0.0}
         
-        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-        stderr_thread.start()
+        def handle_line(line: str):
+            """Parse one line of -progress output."""
+            key, _, value = line.partition("=")
+            field = _PROGRESS_FIELDS.get(key)
+            if field is not None:
+                slot, parse = field
+                try:
+                    state[slot] = parse(value.strip())
+                except ValueError:
+                    pass
+            elif key == "progress":
+                # Update progress
+                elapsed = time.time() - start_time
+                callback(state["current_time"], total_duration, elapsed, state["speed"])
         
         try:
-            while process.poll() is None:
-                line = process.stdout.readline()
-                if not line:
-                    continue
-                
-                # Parse progress output
-                if line.startswith("out_time_ms="):
-                    try:
-                        ms = int(line.split("=")[1].strip())
-                        current_time = ms / 1_000_000.0
-                    except:
-                        pass
-                elif line.startswith("speed="):
-                    try:
-                        speed_str = line.split("=")[1].strip().rstrip("x")
-                        if speed_str and speed_str != "N/A":
-                            speed = float(speed_str)
-                    except:
-                        pass
-                elif line.startswith("progress="):
-                    # Update progress
-                    elapsed = time.time() - start_time
-                    callback(current_time, total_duration, elapsed, speed)
+            if input_text is not None:
+                # FFmpeg reads its stdin input before producing progress output
+                process.stdin.write(input_text)
+                process.stdin.close()
+            
+            if os.name == "posix":
+                self._pump_pipes_selector(process, handle_line)
+            else:
+                # Windows pipes can't be selected on: drain stderr in a thread
+                self._pump_pipes_threaded(process, handle_line)
+            
+            process.wait()
             
             # Final check
             if process.returncode != 0:
@@ -140,9 +243,72 @@ class FFmpegHandler:
             process.kill()
             return False, str(e)
 
+    def _pump_pipes_selector(self, process: subprocess.Popen, handle_line: Callable):
+        """Read stdout/stderr with a single selector until both reach EOF."""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        buffer = ""
+        stdout_fd = process.stdout.fileno()
+        
+        with selectors.DefaultSelector() as sel:
+            for pipe in (process.stdout, process.stderr):
+                os.set_blocking(pipe.fileno(), False)
+                sel.register(pipe.fileno(), selectors.EVENT_READ)
+            
+            while sel.get_map():
+                for key, _ in sel.select(timeout=0.2):
+                    try:
+                        data = os.read(key.fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        sel.unregister(key.fd)
+                        continue
+                    if key.fd != stdout_fd:
+                        continue  # stderr is only drained to prevent blocking
+                    
+                    buffer += decoder.decode(data)
+                    *lines, buffer = buffer.split("\n")
+                    for line in lines:
+                        handle_line(line)
+        
+        if buffer:
+            handle_line(buffer)
+
+    def _pump_pipes_threaded(self, process: subprocess.Popen, handle_line: Callable):
+        """Read stdout line by line while a background thread drains stderr."""
+        def read_stderr():
+            """Read stderr in background to prevent blocking."""
+            try:
+                while process.stderr.read(65536):
+                    pass
+            except:
+                pass
+        
+        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+        stderr_thread.start()
+        
+        # Iterating the pipe only stops at EOF, so there is no poll()/readline spin
+        for line in process.stdout:
+            handle_line(line)
+        stderr_thread.join(timeout=1)
+
+    def _probe_cache_key(self, safe_path: str) -> Optional[tuple]:
+        """Build cache key for a local file (None for URLs or missing files)."""
+        if "://" in safe_path:
+            return None
+        try:
+            st = os.stat(safe_path)
+        except OSError:
+            return None
+        return (safe_path, st.st_mtime_ns, st.st_size)
+
     def get_video_info(self, path) -> Optional[dict]:
-        """Get video metadata using ffprobe."""
+        """Get video metadata using ffprobe (cached per file version)."""
         safe_path = self._safe_path(path)
+        cache_key = self._probe_cache_key(safe_path)
+        if cache_key is not None and cache_key in self._probe_cache:
+            return self._probe_cache[cache_key]
+        
         cmd = [
             self.ffprobe,
             "-hide_banner",
@@ -161,7 +327,10 @@ class FFmpegHandler:
                 errors='replace'
             )
             if result.returncode == 0:
-                return json.loads(result.stdout)
+                info = _json_loads(result.stdout)
+                if cache_key is not None:
+                    self._probe_cache[cache_key] = info
+                return info
             else:
                 log.warning(f"ffprobe failed: {result.stderr[:200] if result.stderr else 'Unknown error'}")
                 return None
@@ -204,6 +373,61 @@ class FFmpegHandler:
         if not success:
             raise RuntimeError(f"Split failed: {error}")
 
+    def split_video_batch(self, input_path, segments: List[Tuple[float, float, str]]) -> List[Tuple[str, bool, str]]:
+        """
+        Split several segments in one FFmpeg run that opens the input once.
+        The input is fast-seeked to the earliest start, so nothing before it is read.
+        
+        Args:
+            segments: List of (start_time, end_time, output_path)
+        
+        Returns:
+            List of (output_path, success, error_message) in the order of segments
+        """
+        safe_input = self._safe_path(input_path)
+        seek = min(start_time for start_time, _, _ in segments)
+        
+        cmd = [
+            self.ffmpeg,
+            "-hide_banner", "-v", "warning", "-stats",
+            "-y"
+        ]
+        if seek > 0:
+            cmd.extend(["-ss", str(seek)])
+        cmd.extend(["-i", safe_input])
+        # One output block per segment, all sharing the single -i;
+        # input seeking resets timestamps, so offsets are relative to the seek point
+        for start_time, end_time, output_path in segments:
+            offset = start_time - seek
+            if offset > 0:
+                cmd.extend(["-ss", str(offset)])
+            cmd.extend([
+                "-t", str(end_time - start_time),
+                "-c", "copy",
+                self._safe_path(output_path)
+            ])
+        
+        log.info(f"Splitting {len(segments)} segments in one pass...")
+        success, error = self._run_ffmpeg(cmd)
+        
+        if success:
+            return [
+                (output_path, True, "") if os.path.exists(output_path)
+                else (output_path, False, "Output not created")
+                for _, _, output_path in segments
+            ]
+        
+        # One bad segment fails the whole run; redo them one by one to pin the error down
+        log.warning(f"Batch split failed, retrying per segment: {error[:200]}")
+        results = []
+        for start_time, end_time, output_path in segments:
+            try:
+                self.split_video(input_path, start_time, end_time, output_path)
+                results.append((output_path, True, ""))
+            except RuntimeError as e:
+                results.append((output_path, False, str(e)))
+        return results
+
     def download_segment(self, url, start_time, end_time, output_path):
         """Download a specific segment from URL using ffmpeg seeking."""
         safe_output = self._safe_path(output_path)
@@ -229,46 +453,51 @@ class FFmpegHandler:
     def join_videos(self, input_paths: list, output_path: str):
         """Join videos using concat demuxer."""
         safe_output = self._safe_path(output_path)
-        list_file = Path("join_list.txt")
         
-        try:
-            # Create concat file with safe paths
-            with open(list_file, "w", encoding="utf-8") as f:
-                for path in input_paths:
-                    safe_path = self._safe_path(path).replace("\\", "/")
-                    f.write(f"file '{safe_path}'\n")
-            
-            cmd = [
-                self.ffmpeg,
-                "-hide_banner", "-v", "warning", "-stats",
-                "-y",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", str(list_file),
-                "-c", "copy",
-                safe_output
-            ]
-            
-            log.info(f"Joining {len(input_paths)} videos...")
-            success, error = self._run_ffmpeg(cmd)
-            
-            if not success:
-                raise RuntimeError(f"Join failed: {error}")
-                
-        finally:
-            if list_file.exists():
-                list_file.unlink()
+        # Concat list is piped on stdin instead of a temporary list file; entries may be URLs
+        cmd = [
+            self.ffmpeg,
+            "-hide_banner", "-v", "warning", "-stats",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-protocol_whitelist", "file,pipe,http,https,tcp,tls",
+            "-i", "pipe:0",
+            "-c", "copy",
+            safe_output
+        ]
+        
+        log.info(f"Joining {len(input_paths)} videos...")
+        success, error = self._run_ffmpeg(cmd, input_text=self.concat_list(input_paths))
+        
+        if not success:
+            raise RuntimeError(f"Join failed: {error}")
 
-    def detect_hw_encoders(self) -> list:
-        """Detect available hardware encoders (cached)."""
-        if self._detected_encoders is not None:
-            return self._detected_encoders
+    def detect_hw_encoders(self, refresh: bool = False) -> list:
+        """
+        Detect available hardware encoders (cached per binary, in memory and on disk).
         
+        Args:
+            refresh: Ignore cached results and probe ffmpeg again (e.g. after a driver install).
+        """
+        with _ENCODER_LOCK:
+            if refresh or self.ffmpeg not in _ENCODER_CACHE:
+                encoders = None if refresh else _load_persisted_encoders(self.ffmpeg)
+                if encoders is None:
+                    encoders = self._probe_hw_encoders()
+                    _persist_encoders(self.ffmpeg, encoders)
+                _ENCODER_CACHE[self.ffmpeg] = encoders
+            return list(_ENCODER_CACHE[self.ffmpeg])
+
+    def _probe_hw_encoders(self) -> list:
+        """Run ffmpeg -encoders and pick out the supported hardware encoders."""
         cmd = [self.ffmpeg, "-hide_banner", "-v", "quiet", "-encoders"]
         try:
+            # Only the encoder list on stdout is used; -v quiet leaves stderr empty
             result = subprocess.run(
                 cmd, 
-                capture_output=True, 
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
                 encoding='utf-8',
                 errors='replace'
@@ -284,28 +513,47 @@ class FFmpegHandler:
             if "h264_amf" in output: encoders.append("h264_amf")
             if "hevc_amf" in output: encoders.append("hevc_amf")
             
-            self._detected_encoders = encoders
             return encoders
-        except subprocess.SubprocessError:
-            self._detected_encoders = []
+        except (subprocess.SubprocessError, OSError):
             return []
 
-    def compress_video(self, input_path: str, output_path: str, 
-                       show_progress: bool = True, compression_level: str = None):
+    def _select_encoder(self, encoders: list, override_enc: str, crf: int, preset: str) -> Tuple[str, bool, list]:
         """
-        Compress video with auto-detected hardware acceleration.
-        Shows encoding info and progress bar.
+        Pick the video encoder for a compression run.
         
-        Args:
-            compression_level: 'low', 'medium', or 'high'. If None, reads from config.
+        Returns:
+            Tuple of (encoder_name, is_hardware, ffmpeg_args)
         """
-        safe_input = self._safe_path(input_path)
-        safe_output = self._safe_path(output_path)
-        
-        encoders = self.detect_hw_encoders()
+        if override_enc:
+            return override_enc, override_enc in self.HARDWARE_ENCODERS, ["-c:v", override_enc]
+        if "hevc_nvenc" in encoders:
+            # Map CRF to NVENC CQ (approximate)
+            nvenc_cq = min(51, max(0, crf + 5))
+            return "hevc_nvenc", True, ["-c:v", "hevc_nvenc", "-preset", "p4", "-cq", str(nvenc_cq)]
+        if "h264_nvenc" in encoders:
+            nvenc_cq = min(51, max(0, crf + 3))
+            return "h264_nvenc", True, ["-c:v", "h264_nvenc", "-preset", "p4", "-cq", str(nvenc_cq)]
+        if "hevc_qsv" in encoders:
+            return "hevc_qsv", True, ["-c:v", "hevc_qsv", "-global_quality", str(crf + 5)]
+        if "h264_qsv" in encoders:
+            return "h264_qsv", True, ["-c:v", "h264_qsv", "-global_quality", str(crf + 3)]
+        return "libx264", False, ["-c:v", "libx264", "-crf", str(crf), "-preset", preset]
+
+    def compress_encoder(self, compression_level: str = None) -> Tuple[str, bool, list]:
+        """
+        Encoder a compression run would use, from the override or the (cached) detection.
         
-        # Get source info
-        info = self.get_video_info(input_path)
+        Returns:
+            Tuple of (encoder_name, is_hardware, ffmpeg_args)
+        """
+        override_enc = self.override_encoding
+        encoders = [] if override_enc else self.detect_hw_encoders()
+        comp_settings = get_compression_settings(compression_level or self.compression_level)
+        return self._select_encoder(encoders, override_enc, comp_settings.crf, comp_settings.preset)
+
+    def _source_geometry(self, path) -> Tuple[int, int, float]:
+        """Width, height and duration of a source (1920x1080 and 0.0 if unknown)."""
+        info = self.get_video_info(path)
         width = 1920
         height = 1080
         duration = 0.0
@@ -313,62 +561,117 @@ class FFmpegHandler:
         if info:
             try:
                 duration = float(info.get('format', {}).get('duration', 0))
-            except:
+            except (TypeError, ValueError):
                 pass
             for stream in info.get('streams', []):
                 if stream.get('codec_type') == 'video':
                     width = int(stream.get('width', 1920))
                     height = int(stream.get('height', 1080))
                     break
+        return width, height, duration
+
+    def _scale_filter(self, width: int, height: int) -> str:
+        """Resize filter capping sources above 1080p at 1920 wide (empty if not needed)."""
+        if width > 1920 or height > 1080:
+            return "scale='min(1920,iw)':-2"
+        return ""
+
+    def _auto_stream_maps(self, index: int, info: dict) -> list:
+        """
+        -map options for input index that pick what FFmpeg's automatic selection (used by
+        compress_video, which passes no -map) keeps for an MP4: the largest video, the audio
+        with the most channels (default-flagged streams first) and the first text subtitle.
+        """
+        streams = info.get('streams', [])
+        
+        def best(codec_type, size):
+            candidates = [
+                st for st in streams
+                if st.get('codec_type') == codec_type and not st.get('disposition', {}).get('attached_pic')
+            ]
+            # max() keeps the first of equal scores, like FFmpeg
+            return max(candidates, default=None, key=lambda st: (
+                size(st) + DEFAULT_STREAM_BONUS * bool(st.get('disposition', {}).get('default'))
+            ))
+        
+        picked = [
+            best('video', lambda st: int(st.get('width', 0)) * int(st.get('height', 0))),
+            best('audio', lambda st: int(st.get('channels', 0))),
+            next((st for st in streams
+                  if st.get('codec_type') == 'subtitle' and st.get('codec_name') in TEXT_SUBTITLE_CODECS), None),
+        ]
+        maps = []
+        for stream in picked:
+            if stream is not None:
+                maps.extend(["-map", f"{index}:{stream['index']}"])
+        return maps
+
+    def _output_complete(self, output_path: str, duration: float) -> bool:
+        """Whether an output exists and covers the source duration (when known)."""
+        if not os.path.exists(output_path):
+            return False
+        info = self.get_video_info(output_path)
+        if not info:
+            return False
+        if duration <= 0:
+            return True
+        try:
+            output_duration = float(info.get('format', {}).get('duration', 0))
+        except (TypeError, ValueError):
+            return False
+        return output_duration >= duration - OUTPUT_DURATION_SLACK
+
+    def _compress_output_args(self) -> list:
+        """Output options shared by every compressed file (after the encoder and filter)."""
+        return [
+            # Let software encoders use all cores (hardware encoders ignore this)
+            "-threads", "0",
+            # Copy audio
+            "-c:a", "copy",
+            # Copied audio runs ahead of slow-starting encoders; a deep queue avoids stalls and
+            # "Too many packets buffered" failures
+            "-max_muxing_queue_size", str(MAX_MUXING_QUEUE_SIZE),
+        ]
+
+    def compress_video(self, input_path: str, output_path: str, 
+                       show_progress: bool = True, compression_level: str = None):
+        """
+        Compress video with auto-detected hardware acceleration.
+        Shows encoding info and progress bar.
+        
+        Args:
+            compression_level: 'low', 'medium', or 'high'. If None, uses self.compression_level.
+        """
+        safe_input = self._safe_path(input_path)
+        safe_output = self._safe_path(output_path)
+        
+        # An override needs no probe; otherwise the (cached) detection picks the encoder
+        override_enc = self.override_encoding
+        encoders = [] if override_enc else self.detect_hw_encoders()
+        
+        # Get source info
+        width, height, duration = self._source_geometry(input_path)
         # Get compression settings
-        comp_settings = get_compression_settings(compression_level)
-        crf = comp_settings["crf"]
-        preset = comp_settings["preset"]
-        level_name = compression_level if compression_level else get_env("COMPRESSION_LEVEL", "medium")
+        level_name = compression_level or self.compression_level
+        comp_settings = get_compression_settings(level_name)
+        crf = comp_settings.crf
+        preset = comp_settings.preset
         log.detail("Compression Level", level_name.upper())
         
         # Determine resize filter
-        scale_filter = ""
-        if width > 1920 or height > 1080:
-            scale_filter = "scale='min(1920,iw)':-2"
+        scale_filter = self._scale_filter(width, height)
+        if scale_filter:
             log.detail("Resize", f"{width}x{height} → 1920p max")
         
-        # Build command
+        # Build command (filter graph threads are a global option, before inputs; one per core)
+        filter_threads = os.cpu_count() or 1
         cmd = [self.ffmpeg, "-hide_banner", "-v", "warning", "-stats", "-y", 
+               "-filter_threads", str(filter_threads),
                "-i", safe_input]
         
         # Select encoder
-        override_enc = get_env("OVERRIDE_ENCODING")
-        selected_encoder = ""
-        is_hardware = False
-        
-        if override_enc:
-            selected_encoder = override_enc
-            is_hardware = override_enc in self.HARDWARE_ENCODERS
-            cmd.extend(["-c:v", override_enc])
-        elif "hevc_nvenc" in encoders:
-            selected_encoder = "hevc_nvenc"
-            is_hardware = True
-            # Map CRF to NVENC CQ (approximate)
-            nvenc_cq = min(51, max(0, crf + 5))
-            cmd.extend(["-c:v", "hevc_nvenc", "-preset", "p4", "-cq", str(nvenc_cq)])
-        elif "h264_nvenc" in encoders:
-            selected_encoder = "h264_nvenc"
-            is_hardware = True
-            nvenc_cq = min(51, max(0, crf + 3))
-            cmd.extend(["-c:v", "h264_nvenc", "-preset", "p4", "-cq", str(nvenc_cq)])
-        elif "hevc_qsv" in encoders:
-            selected_encoder = "hevc_qsv"
-            is_hardware = True
-            cmd.extend(["-c:v", "hevc_qsv", "-global_quality", str(crf + 5)])
-        elif "h264_qsv" in encoders:
-            selected_encoder = "h264_qsv"
-            is_hardware = True
-            cmd.extend(["-c:v", "h264_qsv", "-global_quality", str(crf + 3)])
-        else:
-            selected_encoder = "libx264"
-            is_hardware = False
-            cmd.extend(["-c:v", "libx264", "-crf", str(crf), "-preset", preset])
+        selected_encoder, is_hardware, encoder_args = self._select_encoder(encoders, override_enc, crf, preset)
+        cmd.extend(encoder_args)
         
         # Log encoder info
         log.encoding(selected_encoder, is_hardware)
@@ -377,8 +680,7 @@ class FFmpegHandler:
         if scale_filter:
             cmd.extend(["-vf", scale_filter])
         
-        # Copy audio
-        cmd.extend(["-c:a", "copy"])
+        cmd.extend(self._compress_output_args())
         cmd.append(safe_output)
         
         # Run with progress if duration is known
@@ -396,3 +698,99 @@ class FFmpegHandler:
         
         if not success:
             raise RuntimeError(f"Compression failed: {error}")
+
+    def compress_batch(self, jobs: List[Tuple[str, str]], compression_level: str = None) -> List[Tuple[str, bool, str]]:
+        """
+        Compress several (small) files in one FFmpeg run, so process startup and
+        encoder initialization are paid once. Each input is mapped to its own output.
+        Hardware encoders open one session per output, so with one of them selected
+        the files are compressed one by one instead.
+        
+        Args:
+            jobs: List of (input_path, output_path)
+            compression_level: 'low', 'medium', or 'high'. If None, uses self.compression_level.
+        
+        Returns:
+            List of (output_path, success, error_message) in the order of jobs
+        """
+        selected_encoder, is_hardware, encoder_args = self.compress_encoder(compression_level)
+        if is_hardware:
+            return self._compress_each(jobs, compression_level)
+        
+        # Stream choice needs the probe; an input that cannot be probed runs on its own
+        infos = [self.get_video_info(input_path) for input_path, _ in jobs]
+        unprobed = [k for k, info in enumerate(infos) if not info]
+        if unprobed:
+            results = [None] * len(jobs)
+            probed = [k for k, info in enumerate(infos) if info]
+            for k, result in zip(unprobed, self._compress_each([jobs[k] for k in unprobed], compression_level)):
+                results[k] = result
+            if probed:
+                for k, result in zip(probed, self.compress_batch([jobs[k] for k in probed], compression_level)):
+                    results[k] = result
+            return results
+        
+        log.encoding(selected_encoder, is_hardware)
+        
+        filter_threads = os.cpu_count() or 1
+        cmd = [self.ffmpeg, "-hide_banner", "-v", "warning", "-stats", "-y",
+               "-filter_threads", str(filter_threads)]
+        for input_path, _ in jobs:
+            cmd.extend(["-i", self._safe_path(input_path)])
+        
+        # Explicit maps keep each output on its own input, with the streams compress_video's
+        # automatic selection would keep; the resize rule is the one compress_video applies
+        durations = []
+        for k, ((input_path, output_path), info) in enumerate(zip(jobs, infos)):
+            width, height, duration = self._source_geometry(input_path)
+            durations.append(duration)
+            scale_filter = self._scale_filter(width, height)
+            log.detail(os.path.basename(input_path),
+                       f"{width}x{height} → 1920p max" if scale_filter else f"{width}x{height}")
+            cmd.extend(self._auto_stream_maps(k, info))
+            cmd.extend(encoder_args)
+            if scale_filter:
+                cmd.extend(["-vf", scale_filter])
+            cmd.extend(self._compress_output_args())
+            cmd.append(self._safe_path(output_path))
+        
+        # Outputs are encoded side by side, so the run is as long as its longest input
+        total_duration = max(durations)
+        if total_duration > 0:
+            log.info(f"Compressing {len(jobs)} files in one pass ({total_duration:.1f}s)...")
+            success, error = self._run_ffmpeg(cmd, progress_callback=log.progress, total_duration=total_duration)
+            log.progress_done()
+        else:
+            log.info(f"Compressing {len(jobs)} files in one pass...")
+            success, error = self._run_ffmpeg(cmd)
+        
+        if success:
+            return [
+                (output_path, True, "") if os.path.exists(output_path)
+                else (output_path, False, "Output not created")
+                for _, output_path in jobs
+            ]
+        
+        # One bad input fails the whole run; outputs that were written in full are kept,
+        # the rest are redone one by one to pin the error down
+        log.warning(f"Batch compression failed, retrying unfinished files: {error[:200]}")
+        results, retry = [None] * len(jobs), []
+        for k, ((input_path, output_path), duration) in enumerate(zip(jobs, durations)):
+            if self._output_complete(output_path, duration):
+                results[k] = (output_path, True, "")
+            else:
+                retry.append(k)
+        for k, result in zip(retry, self._compress_each([jobs[k] for k in retry], compression_level)):
+            results[k] = result
+        return results
+
+    def _compress_each(self, jobs: List[Tuple[str, str]], compression_level: str = None) -> List[Tuple[str, bool, str]]:
+        """Compress jobs one FFmpeg run at a time; same result shape as compress_batch."""
+        results = []
+        for input_path, output_path in jobs:
+            try:
+                self.compress_video(input_path, output_path, compression_level=compression_level)
+                results.append((output_path, True, ""))
+            except RuntimeError as e:
+                results.append((output_path, False, str(e)))
+        return results
@@ -1,9 +1,38 @@
+import re
+import html
+import socket
 import subprocess
 import time
-import requests
 import logging
-from bs4 import BeautifulSoup
 from .config import get_binary_path
+from utils.process_utils import NEW_GROUP_KWARGS, terminate_group, track, untrack
+
+# Retry backoff for fetching the served page (seconds)
+BACKOFF_INITIAL = 0.05
+BACKOFF_MAX = 0.8
+# Total time get_download_link waits for the page to list the file (seconds)
+LINK_WAIT = 1.5
+# Timeout of the TCP check that the server is listening before each page fetch (seconds)
+PORT_CHECK_TIMEOUT = 0.2
+
+# Anchor hrefs on the TDL serve index page
+_HREF_RE = re.compile(rb'<a\s[^>]*?href\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+
+def port_listening(port: int, timeout: float = PORT_CHECK_TIMEOUT) -> bool:
+    """Check that something accepts TCP connections on localhost:port (no HTTP request)."""
+    try:
+        with socket.create_connection(("localhost", port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def free_local_port() -> int:
+    """Ask the OS for a localhost TCP port that is currently unused."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
 
 class TDLHandler:
     """Handler for Telegram Download (TDL) operations with context manager support."""
@@ -12,15 +41,35 @@ class TDLHandler:
         self.tdl_bin = get_binary_path("tdl")
         self.port = port
         self.process = None
+        # Whether the last start_serve saw the server answer
+        self.serving = False
         self._current_url = None
+        # Persistent localhost connections for health probes and page fetches (created on first use)
+        self._session = None
 
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop_serve()
+        self._close_session()
         return False
 
+    def _get_session(self):
+        """Get the pooled localhost session; requests is only imported once a link is resolved."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            self._session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        return self._session
+
+    def _close_session(self):
+        """Drop pooled connections (they point at a server that is gone)."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
     def clean_url(self, url):
         """Remove query parameters like ?t=... from Telegram links."""
         return url.split('?')[0]
@@ -56,11 +105,14 @@ class TDLHandler:
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True
+            text=True,
+            **NEW_GROUP_KWARGS
         )
+        track(self.process)
         
         # Optimized polling instead of fixed sleep
-        if not self._wait_for_server(timeout=10):
+        self.serving = self._wait_for_server(timeout=10)
+        if not self.serving:
             logging.warning("TDL server may not be fully ready, proceeding anyway...")
         
         return self.process
@@ -80,40 +132,50 @@ class TDLHandler:
 
     def valid_port(self, port=None):
         """Check if port is open/serving."""
+        import requests
         check_port = port or self.port
         try:
-            requests.get(f"http://localhost:{check_port}", timeout=0.5)
+            self._get_session().get(f"http://localhost:{check_port}", timeout=0.5)
             return True
         except (requests.ConnectionError, requests.Timeout):
             return False
 
-    def get_download_link(self, port=None):
-        """Scrape the served page for the raw file link with optimized retries."""
+    def get_download_link(self, port=None, max_wait=LINK_WAIT):
+        """
+        Scrape the served page for the raw file link.
+        Retries with exponential backoff (50ms doubling, capped at 0.8s) until max_wait elapses;
+        while the port is not listening yet, a retry is a bare TCP connect instead of a page fetch.
+        """
+        import requests
         check_port = port or self.port
         base_url = f"http://localhost:{check_port}"
-        max_retries = 5
+        deadline = time.monotonic() + max_wait
+        attempt = 0
         
-        for i in range(max_retries):
+        while True:
             if self.process and self.process.poll() is not None:
                 logging.error("TDL process terminated unexpectedly.")
                 return None
                 
-            try:
-                response = requests.get(base_url, timeout=2)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    for link in soup.find_all('a'):
-                        href = link.get('href')
-                        if href and href not in ['/', '#']:
-                            return f"{base_url}{href}" if href.startswith('/') else f"{base_url}/{href}"
-            except requests.RequestException:
-                pass
+            if port_listening(check_port):
+                try:
+                    timeout = max(0.1, deadline - time.monotonic())
+                    response = self._get_session().get(base_url, timeout=timeout)
+                    if response.status_code == 200:
+                        for match in _HREF_RE.finditer(response.content):
+                            href = html.unescape(match.group(1).decode('utf-8', errors='replace'))
+                            if href and href not in ['/', '#']:
+                                return f"{base_url}{href}" if href.startswith('/') else f"{base_url}/{href}"
+                except requests.RequestException:
+                    pass
             
-            if i < max_retries - 1:  # Don't log on last iteration
-                logging.info(f"Waiting for TDL content... ({i+1}/{max_retries})")
-                time.sleep(1)  # Reduced from 2s to 1s
+            delay = min(BACKOFF_INITIAL * 2 ** attempt, BACKOFF_MAX)
+            if time.monotonic() + delay > deadline:
+                return None
             
-        return None
+            attempt += 1
+            logging.info(f"Waiting for TDL content... (attempt {attempt}, retry in {delay:.2f}s)")
+            time.sleep(delay)
 
     def resolve_url(self, telegram_url):
         """
@@ -132,18 +194,16 @@ class TDLHandler:
             return None, False
 
     def stop_serve(self):
-        """Kill the TDL process safely."""
+        """Kill the TDL process and anything it spawned."""
         if self.process:
             try:
-                self.process.terminate()
-                try:
-                    self.process.wait(timeout=3)
-                except subprocess.TimeoutExpired:
-                    self.process.kill()
-                    self.process.wait(timeout=2)
+                terminate_group(self.process, timeout=3)
             except Exception as e:
                 logging.warning(f"Error stopping TDL process: {e}")
             finally:
+                untrack(self.process)
                 self.process = None
+                self.serving = False
                 self._current_url = None
+                self._close_session()
             logging.info("TDL server stopped.")
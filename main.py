@@ -1,23 +1,25 @@
 import sys
 import os
 import json
-import ctypes
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
+from queue import Queue
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from InquirerPy import inquirer
-from InquirerPy.base.control import Choice
-from InquirerPy.separator import Separator
 
 from core.config import (
-    ensure_config, load_config, get_env, ensure_output_extension, 
-    get_output_path, ENV_PATH, COMPRESSION_LEVELS
+    load_config, get_env, save_env, ensure_output_extension, DEFAULT_EXTENSION,
+    get_output_path, auto_max_queue, COMPRESSION_LEVELS
 )
 from core.ffmpeg_handler import FFmpegHandler
-from core.tdl_handler import TDLHandler
-from core.downloader import Downloader
-from utils.helpers import time_str_to_seconds
+from core.tdl_handler import TDLHandler, free_local_port
+from core.downloader import Downloader, DEFAULT_AUTO_WORKERS
+from utils.helpers import time_strs_to_seconds
 from utils.logger import log
-from utils.path_utils import normalize_path, expand_input, get_input_summary
+from utils.path_utils import normalize_path, expand_input, get_input_summary, classify_source, inspect_input
 import colorama
 from termcolor import colored
 
@@ -27,17 +29,80 @@ colorama.init()
 # Application version
 VERSION = "1.6.0"
 
+# Remembered downloads may total this share of available memory, where the page cache
+# likely still holds them (least recently used are forgotten first)
+URL_CACHE_MEMORY_SHARE = 0.02
+# Budget when available memory cannot be read
+URL_CACHE_FALLBACK_BYTES = 256 * 1024 * 1024
+
+# Local files up to this size are compressed several to one FFmpeg run, where process
+# startup and encoder setup are a large share of the work
+COMPRESS_BATCH_MAX_BYTES = 64 * 1024 * 1024
+COMPRESS_BATCH_FILES = 4
+
+# Queue files smaller than this are parsed whole; streaming only pays off for large ones
+STREAM_QUEUE_MIN_BYTES = 64 * 1024
+
+
+@lru_cache(maxsize=16)
+def _parse_queue_file(path: str, mtime_ns: int, size: int):
+    """
+    Parse a whole JSON queue file with orjson if available, else the stdlib json.
+    Cached on (path, mtime, size), so re-running an unchanged queue skips the parse;
+    callers must treat the result as read-only.
+    """
+    try:
+        import orjson
+    except ImportError:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _url_cache_budget() -> int:
+    """Bytes of downloads the URL cache remembers: a share of available memory (psutil if installed)."""
+    try:
+        import psutil
+        available = psutil.virtual_memory().available
+    except ImportError:
+        try:
+            available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return URL_CACHE_FALLBACK_BYTES
+    return max(1, int(available * URL_CACHE_MEMORY_SHARE))
+
 
 def set_console_title(title: str):
     """Set console window title."""
     if sys.platform == "win32":
+        import ctypes
         ctypes.windll.kernel32.SetConsoleTitleW(title)
 
 
-def print_banner():
-    os.system('cls' if os.name == 'nt' else 'clear')
-    set_console_title(f"Video Tools CLI v{VERSION}")
-    banner = r"""
+# Clear the screen with ANSI escapes; `--no-ansi` falls back to cls/clear for terminals without them
+USE_ANSI_CLEAR = "--no-ansi" not in sys.argv
+
+# SetConsoleMode flag that makes the Windows console interpret ANSI escapes itself
+ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+
+
+@lru_cache(maxsize=None)
+def enable_vt_mode() -> bool:
+    """Switch the Windows console to native ANSI handling (once); other platforms always have it."""
+    if os.name != "nt":
+        return True
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    return bool(kernel32.SetConsoleMode(handle, mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING))
+
+
+BANNER = r"""
        _      _             _             _     
       (_)    | |           | |           | |    
  __   ___  __| | ___  ___  | |_ ___   ___| |___ 
@@ -45,32 +110,67 @@ def print_banner():
   \ V /| | (_| |  __/ (_) || || (_) | (_) | \__ \
    \_/ |_|\__,_|\___|\___/  \__\___/ \___/|_|___/
 """
-    print(colored(banner, 'cyan', attrs=['bold']))
-    print(colored(f"Version: {VERSION}", 'yellow'))
-    print(colored("Crafted by: thio", 'magenta'))
-    print("\n")
+
+# Colored banner block, rendered once and written in a single call per redraw
+BANNER_TEXT = (
+    colored(BANNER, 'cyan', attrs=['bold']) + "\n"
+    + colored(f"Version: {VERSION}", 'yellow') + "\n"
+    + colored("Crafted by: thio", 'magenta') + "\n"
+    + "\n\n"
+)
+
+
+def print_banner():
+    set_console_title(f"Video Tools CLI v{VERSION}")
+    if USE_ANSI_CLEAR and sys.stdout.isatty() and enable_vt_mode():
+        # Clear screen + cursor home; consoles without VT support (pre-Windows 10) use cls
+        sys.stdout.write("\x1b[2J\x1b[H" + BANNER_TEXT)
+    else:
+        os.system('cls' if os.name == 'nt' else 'clear')
+        sys.stdout.write(BANNER_TEXT)
+    sys.stdout.flush()
 
 
 # Ensure config is loaded
-ensure_config()
 load_config()
 
 
 class VideoCLI:
     def __init__(self):
-        self.max_queue = int(get_env("MAX_QUEUE", 2))
-        self.download_max_connection = int(get_env("DOWNLOAD_MAX_CONNECTION", 4))
+        # 0 / unset = auto: queue size from the CPU count, connections measured per host
+        self.max_queue_auto = int(get_env("MAX_QUEUE", "") or 0) == 0
+        self.max_queue = auto_max_queue() if self.max_queue_auto else int(get_env("MAX_QUEUE"))
+        self.download_max_connection = int(get_env("DOWNLOAD_MAX_CONNECTION", "") or 0)
         self.override_encoding = get_env("OVERRIDE_ENCODING", "")
         self.compression_level = get_env("COMPRESSION_LEVEL", "medium")
         # Shared instances
         self.ffmpeg = FFmpegHandler()
         self.tdl = TDLHandler()
         self.downloader = Downloader(ffmpeg_handler=self.ffmpeg, max_workers=self.download_max_connection)
+        # Downloads reused within the session: URL -> (local file, size), bounded in total bytes
+        self._url_cache = OrderedDict()
+        self._url_cache_bytes = 0
+        self._url_cache_budget = _url_cache_budget()
+        self._url_locks = {}
+        self._url_cache_guard = threading.Lock()
+        # Encoder menu entries, built the first time the encoder setting is opened
+        self._encoder_choices = None
+        # True while the screen holds the banner plus menu prompts only (no flow output)
+        self._banner_drawn = False
+        # JSON batch groups downloading right now; each takes an equal share of the connections
+        self._json_groups_active = 0
+        self._json_groups_lock = threading.Lock()
+        # Worker pool for split and compress fan-out, kept across actions (created on first use)
+        self._executor = None
+        atexit.register(self._shutdown_executor)
 
     def run(self):
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
+        from InquirerPy.separator import Separator
         while True:
-            print_banner()
-            print(f"Queue: {self.max_queue} | Connections: {self.download_max_connection} | Compression: {self.compression_level}")
+            self._show_banner()
+            print(f"Queue: {self._queue_label()} | Connections: {self._connections_label()} | Compression: {self.compression_level}")
             action = inquirer.select(
                 message="Select action:",
                 choices=[
@@ -94,22 +194,26 @@ class VideoCLI:
 
     def show_settings(self):
         """Show settings menu for editing configuration."""
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
+        from InquirerPy.separator import Separator
         while True:
             print_banner()
             log.section("SETTINGS")
             
-            log.detail("Max Queue (parallel)", str(self.max_queue))
-            log.detail("Download Connections", str(self.download_max_connection))
+            log.detail("Max Queue (parallel)", self._queue_label())
+            log.detail("Download Connections", self._connections_label())
             log.detail("Compression Level", self.compression_level)
             log.detail("Override Encoding", self.override_encoding or "(auto-detect)")
             
             setting = inquirer.select(
                 message="Select setting to modify:",
                 choices=[
-                    Choice(value="max_queue", name=f"Max Queue [{self.max_queue}]"),
-                    Choice(value="connections", name=f"Download Connections [{self.download_max_connection}]"),
+                    Choice(value="max_queue", name=f"Max Queue [{self._queue_label()}]"),
+                    Choice(value="connections", name=f"Download Connections [{self._connections_label()}]"),
                     Choice(value="compression", name=f"Compression Level [{self.compression_level}]"),
                     Choice(value="encoding", name=f"Override Encoding [{self.override_encoding or 'auto'}]"),
+                    Choice(value="refresh_encoders", name="Refresh Hardware Encoders"),
                     Separator(),
                     Choice(value="back", name="Back"),
                 ],
@@ -119,23 +223,28 @@ class VideoCLI:
                 break
             elif setting == "max_queue":
                 val = inquirer.text(
-                    message="Enter Max Queue (1-16):",
-                    default=str(self.max_queue)
+                    message="Enter Max Queue (1-16, 0 = auto):",
+                    default="0" if self.max_queue_auto else str(self.max_queue)
                 ).execute()
-                if val.isdigit() and 1 <= int(val) <= 16:
-                    self.max_queue = int(val)
-                    self._save_env("MAX_QUEUE", val)
-                    log.success(f"Max Queue set to {val}")
+                n = int(val) if val.isdigit() else -1
+                if 0 <= n <= 16:
+                    self.max_queue_auto = n == 0
+                    self.max_queue = auto_max_queue() if self.max_queue_auto else n
+                    # The next fan-out builds a pool of the new size
+                    self._shutdown_executor()
+                    self._save_env("MAX_QUEUE", str(n))
+                    log.success(f"Max Queue set to {self._queue_label()}")
             elif setting == "connections":
                 val = inquirer.text(
-                    message="Enter Download Connections (1-64):",
+                    message="Enter Download Connections (1-64, 0 = auto):",
                     default=str(self.download_max_connection)
                 ).execute()
-                if val.isdigit() and 1 <= int(val) <= 64:
-                    self.download_max_connection = int(val)
-                    self.downloader.max_workers = int(val)
-                    self._save_env("DOWNLOAD_MAX_CONNECTION", val)
-                    log.success(f"Download Connections set to {val}")
+                n = int(val) if val.isdigit() else -1
+                if 0 <= n <= 64:
+                    self.download_max_connection = n
+                    self.downloader.set_max_workers(n)
+                    self._save_env("DOWNLOAD_MAX_CONNECTION", str(n))
+                    log.success(f"Download Connections set to {self._connections_label()}")
             elif setting == "compression":
                 val = inquirer.select(
                     message="Select compression level:",
@@ -147,15 +256,11 @@ class VideoCLI:
                     default=self.compression_level
                 ).execute()
                 self.compression_level = val
+                self.ffmpeg.compression_level = val
                 self._save_env("COMPRESSION_LEVEL", val)
                 log.success(f"Compression set to {val}")
             elif setting == "encoding":
-                encoders = self.ffmpeg.detect_hw_encoders()
-                choices = [Choice(value="", name="Auto-detect (recommended)")]
-                for enc in encoders:
-                    choices.append(Choice(value=enc, name=enc))
-                choices.append(Choice(value="libx264", name="libx264 (CPU)"))
-                choices.append(Choice(value="libx265", name="libx265 (CPU)"))
+                choices = self._get_encoder_choices()
                 
                 val = inquirer.select(
                     message="Select encoder:",
@@ -164,30 +269,65 @@ class VideoCLI:
                 ).execute()
                 
                 self.override_encoding = val
+                self.ffmpeg.override_encoding = val
                 self._save_env("OVERRIDE_ENCODING", val)
                 log.success(f"Encoder set to {val or 'auto-detect'}")
+            elif setting == "refresh_encoders":
+                encoders = self.ffmpeg.detect_hw_encoders(refresh=True)
+                self._encoder_choices = None
+                log.success(f"Hardware encoders: {', '.join(encoders) or 'none found'}")
+        
+        # The settings details are still on screen
+        self._banner_drawn = False
+
+    def _show_banner(self):
+        """Clear and redraw the banner unless the screen only holds menu prompts since the last redraw."""
+        if not self._banner_drawn:
+            print_banner()
+            self._banner_drawn = True
+
+    def _queue_label(self) -> str:
+        """Max Queue as shown in menus, marking a CPU-derived value."""
+        return f"{self.max_queue} (auto)" if self.max_queue_auto else str(self.max_queue)
+
+    def _connections_label(self) -> str:
+        """Download connections as shown in menus (0 means measured per host)."""
+        return str(self.download_max_connection) if self.download_max_connection else "auto"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the shared MAX_QUEUE-sized worker pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_queue)
+        return self._executor
+
+    def _shutdown_executor(self):
+        """Release the shared pool's threads once its queued work is done."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_encoder_choices(self):
+        """Get the encoder menu entries; hardware encoders are probed on first use only."""
+        from InquirerPy.base.control import Choice
+        if self._encoder_choices is None:
+            choices = [Choice(value="", name="Auto-detect (recommended)")]
+            for enc in self.ffmpeg.detect_hw_encoders():
+                choices.append(Choice(value=enc, name=enc))
+            choices.append(Choice(value="libx264", name="libx264 (CPU)"))
+            choices.append(Choice(value="libx265", name="libx265 (CPU)"))
+            self._encoder_choices = choices
+        return self._encoder_choices
 
     def _save_env(self, key: str, value: str):
         """Save a setting to .env file."""
         try:
-            env_content = {}
-            if ENV_PATH.exists():
-                with open(ENV_PATH, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if '=' in line and not line.startswith('#'):
-                            k, v = line.split('=', 1)
-                            env_content[k] = v
-            
-            env_content[key] = value
-            
-            with open(ENV_PATH, 'w', encoding='utf-8') as f:
-                for k, v in env_content.items():
-                    f.write(f"{k}={v}\n")
+            save_env(key, value)
         except Exception as e:
             log.error(f"Failed to save setting: {e}")
 
     def handle_action(self, action):
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
         while True:
             print(f"\nQueue: {self.max_queue} | Action: {action}")
             source = inquirer.select(
@@ -202,12 +342,15 @@ class VideoCLI:
             if source == "back":
                 break
             
+            # Flow output (progress, results) needs a fresh screen back in the main menu
+            self._banner_drawn = False
             if source == "manual":
                 self.process_manual_input(action)
             elif source == "json":
                 self.process_json_input(action)
 
     def process_manual_input(self, action):
+        from InquirerPy import inquirer
         log.section(f"Action: {action.upper()}")
         
         if action == "split":
@@ -231,12 +374,9 @@ class VideoCLI:
 
     def do_split_flow(self):
         """Split video into segments."""
+        from InquirerPy import inquirer
         raw_input = inquirer.text(message="Video path / URL:").execute()
-        url_or_path = normalize_path(raw_input)
-        
-        # Get source folder for output
-        source_folder = Path(url_or_path).parent if not url_or_path.startswith("http") else Path(".")
-        default_output = Path(url_or_path).stem if not url_or_path.startswith("http") else "output"
+        info = inspect_input(raw_input)
         
         output_base = inquirer.text(
             message="Output name (empty = source name):",
@@ -244,27 +384,25 @@ class VideoCLI:
         ).execute()
         
         if not output_base.strip():
-            output_base = default_output
+            output_base = info.stem
         
         segments = self._collect_segments()
         if not segments:
             log.warning("No segments defined.")
             return
-
-        is_url = url_or_path.startswith("http") or TDLHandler.is_telegram_link(url_or_path)
         
-        if is_url:
-            self._process_url_split(url_or_path, output_base, segments, Path("."))
+        if info.is_url:
+            self._process_url_split(info.path, output_base, segments, info.folder, is_tdl=info.is_tdl)
         else:
-            self._process_local_split_parallel(url_or_path, output_base, segments, source_folder)
+            self._process_local_split_parallel(info.path, output_base, segments, info.folder)
 
     def do_split_join_flow(self):
         """Split multiple segments and join them into one video."""
+        from InquirerPy import inquirer
         raw_input = inquirer.text(message="Video path / URL:").execute()
-        url_or_path = normalize_path(raw_input)
-        
-        source_folder = Path(url_or_path).parent if not url_or_path.startswith("http") and not TDLHandler.is_telegram_link(url_or_path) else Path(".")
-        default_output = Path(url_or_path).stem if not url_or_path.startswith("http") and not TDLHandler.is_telegram_link(url_or_path) else "output"
+        info = inspect_input(raw_input)
+        url_or_path, is_url, is_tdl = info.path, info.is_url, info.is_tdl
+        source_folder = info.folder
         
         output_name = inquirer.text(
             message="Final output name (empty = source_joined):",
@@ -272,7 +410,7 @@ class VideoCLI:
         ).execute()
         
         if not output_name.strip():
-            output_name = f"{default_output}_joined.mp4"
+            output_name = f"{info.stem}_joined.mp4"
         else:
             output_name = ensure_output_extension(output_name)
         
@@ -286,9 +424,6 @@ class VideoCLI:
         log.detail("Segments", str(len(segments)))
         log.detail("Output", output_name)
         
-        is_url = url_or_path.startswith("http") or TDLHandler.is_telegram_link(url_or_path)
-        is_tdl = TDLHandler.is_telegram_link(url_or_path)
-        
         # Create temp segments
         temp_files = []
         temp_base = f"_temp_segment_{os.getpid()}"
@@ -306,53 +441,36 @@ class VideoCLI:
                 final_url = resolved
                 log.success("Telegram link resolved.")
             
+            # Convert and validate every range once, before any download or split starts
+            temp_segments = []
+            for i, ((start, end), (start_sec, end_sec)) in enumerate(zip(segments, time_strs_to_seconds(segments))):
+                if end_sec <= start_sec:
+                    log.warning(f"Invalid range {start}-{end}, skipping.")
+                    continue
+                temp_segments.append((start_sec, end_sec, str(source_folder / f"{temp_base}_{i}.mp4")))
+            
             if is_url:
-                # Download segments from URL using parallel chunked download
-                for i, (start, end) in enumerate(segments):
-                    temp_file = str(source_folder / f"{temp_base}_{i}.mp4")
-                    start_sec = time_str_to_seconds(start)
-                    end_sec = time_str_to_seconds(end)
-                    if end_sec <= start_sec:
-                        continue
-                    log.info(f"Downloading segment {i+1}/{len(segments)} ({self.download_max_connection} connections)...")
-                    try:
-                        # Use parallel chunked download
-                        if self.downloader.download_segment_parallel(final_url, start_sec, end_sec, temp_file):
+                # Download segments concurrently, collecting them as they land
+                log.info(f"Downloading {len(temp_segments)} segment(s) ({self._connections_label()} connections)...")
+                finished = {}
+                for idx, temp_file, success in self.downloader.iter_completed_segments(final_url, temp_segments):
+                    if success:
+                        finished[idx] = temp_file
+                        temp_files.append(temp_file)  # tracked for cleanup right away
+                    else:
+                        log.error(f"Segment {idx + 1} download failed")
+                
+                # Join order follows the segment order, not completion order
+                temp_files = [finished[idx] for idx in sorted(finished)]
+            else:
+                # Split local file, a few FFmpeg runs in parallel
+                if temp_segments:
+                    for i, (temp_file, success, error) in enumerate(self._split_local(url_or_path, temp_segments)):
+                        if success:
                             temp_files.append(temp_file)
+                            log.step(len(temp_files), len(segments), "Segment split complete")
                         else:
-                            log.error(f"Segment {i+1} download failed")
-                    except Exception as e:
-                        log.error(f"Segment {i+1} failed", details=str(e))
-            else:
-                # Split local file in parallel
-                def split_segment(args):
-                    i, start, end = args
-                    temp_file = str(source_folder / f"{temp_base}_{i}.mp4")
-                    start_sec = time_str_to_seconds(start)
-                    end_sec = time_str_to_seconds(end)
-                    if end_sec <= start_sec:
-                        return None
-                    try:
-                        self.ffmpeg.split_video(url_or_path, start_sec, end_sec, temp_file)
-                        return (i, temp_file)
-                    except Exception as e:
-                        log.error(f"Segment {i+1} failed", details=str(e))
-                        return None
-                
-                segment_args = [(i, s, e) for i, (s, e) in enumerate(segments)]
-                
-                with ThreadPoolExecutor(max_workers=self.max_queue) as executor:
-                    futures = {executor.submit(split_segment, args): args[0] for args in segment_args}
-                    results = []
-                    for future in as_completed(futures):
-                        result = future.result()
-                        if result:
-                            results.append(result)
-                            log.step(len(results), len(segments), "Segment split complete")
-                    
-                    # Sort by index and extract files
-                    results.sort(key=lambda x: x[0])
-                    temp_files = [f for _, f in results]
+                            log.error(f"Segment {i+1} failed", details=error)
             
             if len(temp_files) < 1:
                 log.error("No segments to join.")
@@ -377,6 +495,7 @@ class VideoCLI:
 
     def _collect_segments(self):
         """Collect time segments from user input."""
+        from InquirerPy import inquirer
         segments = []
         while True:
             start = inquirer.text(message="Start Time (HH.MM):").execute()
@@ -388,9 +507,15 @@ class VideoCLI:
                 break
         return segments
 
-    def _process_url_split(self, url, output_base, segments, output_folder):
-        """Process split from URL."""
-        is_tdl = TDLHandler.is_telegram_link(url)
+    def _process_url_split(self, url, output_base, segments, output_folder, is_tdl=None):
+        """
+        Process split from URL.
+        
+        Args:
+            is_tdl: Whether url is a Telegram link, if the caller already classified it
+        """
+        if is_tdl is None:
+            is_tdl = TDLHandler.is_telegram_link(url)
         final_url = url
         
         if is_tdl:
@@ -405,13 +530,12 @@ class VideoCLI:
         
         try:
             download_segments = []
-            for i, (start, end) in enumerate(segments):
-                start_sec = time_str_to_seconds(start)
-                end_sec = time_str_to_seconds(end)
+            for i, ((start, end), (start_sec, end_sec)) in enumerate(zip(segments, time_strs_to_seconds(segments))):
                 if end_sec <= start_sec:
                     log.warning(f"Invalid range {start}-{end}, skipping.")
                     continue
-                out_file = str(output_folder / ensure_output_extension(f"{output_base}_{i+1}"))
+                # "<base>_<n>" never ends in the extension, so append it directly
+                out_file = str(output_folder / f"{output_base}_{i+1}{DEFAULT_EXTENSION}")
                 download_segments.append((start_sec, end_sec, out_file))
             
             if not download_segments:
@@ -419,58 +543,137 @@ class VideoCLI:
                 return
             
             log.info(f"Processing {len(download_segments)} segment(s)...")
-            results = self.downloader.batch_download_segments(final_url, download_segments)
+            success_count = 0
+            for _, out_file, success in self.downloader.iter_completed_segments(final_url, download_segments):
+                if success:
+                    success_count += 1
+                    log.success(f"Created {Path(out_file).name}")
+                else:
+                    log.error(f"Failed: {Path(out_file).name}")
             
-            success_count = sum(1 for _, success in results if success)
-            log.success(f"Completed: {success_count}/{len(results)} segments")
+            log.success(f"Completed: {success_count}/{len(download_segments)} segments")
             
         finally:
             if is_tdl:
                 self.tdl.stop_serve()
 
-    def _process_local_split_parallel(self, input_path, output_base, segments, output_folder):
-        """Process split from local file with parallel processing."""
-        log.info(f"Processing {len(segments)} splits with {self.max_queue} parallel workers...")
+    def _split_local(self, input_path, split_segments):
+        """
+        Cut segments of a local file with up to MAX_QUEUE FFmpeg runs in parallel.
+        Each run takes a contiguous group of segments, so the input is opened once per group.
         
-        def split_task(args):
-            i, start, end = args
-            start_sec = time_str_to_seconds(start)
-            end_sec = time_str_to_seconds(end)
-            if end_sec <= start_sec:
-                return (i, False, f"Invalid range {start}-{end}")
-            out_file = str(output_folder / ensure_output_extension(f"{output_base}_{i+1}"))
+        Returns:
+            List of (output_path, success, error_message) in the order of split_segments
+        """
+        groups = min(self.max_queue, len(split_segments))
+        size = -(-len(split_segments) // groups)
+        batches = [split_segments[i:i + size] for i in range(0, len(split_segments), size)]
+        if len(batches) == 1:
+            return self.ffmpeg.split_video_batch(input_path, batches[0])
+        
+        results = [None] * len(batches)
+        executor = self._get_executor()
+        futures = {executor.submit(self.ffmpeg.split_video_batch, input_path, batch): n for n, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            n = futures[future]
             try:
-                self.ffmpeg.split_video(input_path, start_sec, end_sec, out_file)
-                return (i, True, Path(out_file).name)
+                results[n] = future.result()
             except Exception as e:
-                return (i, False, str(e))
-        
-        segment_args = [(i, s, e) for i, (s, e) in enumerate(segments)]
+                log.error(f"Split batch {n + 1} error: {e}")
+                results[n] = [(out_file, False, str(e)) for _, _, out_file in batches[n]]
+        return [result for batch in results for result in batch]
+
+    def _process_local_split_parallel(self, input_path, output_base, segments, output_folder):
+        """Process split from local file with parallel FFmpeg runs over segment groups."""
+        split_segments = []
+        for i, ((start, end), (start_sec, end_sec)) in enumerate(zip(segments, time_strs_to_seconds(segments))):
+            if end_sec <= start_sec:
+                log.error(f"[{i+1}/{len(segments)}] Failed: Invalid range {start}-{end}")
+                continue
+            out_file = str(output_folder / f"{output_base}_{i+1}{DEFAULT_EXTENSION}")
+            split_segments.append((start_sec, end_sec, out_file))
         
-        with ThreadPoolExecutor(max_workers=self.max_queue) as executor:
-            futures = {executor.submit(split_task, args): args[0] for args in segment_args}
-            completed = 0
-            success_count = 0
-            
-            for future in as_completed(futures):
-                completed += 1
-                idx, success, msg = future.result()
+        success_count = 0
+        if split_segments:
+            log.info(f"Processing {len(split_segments)} splits with up to {self.max_queue} parallel workers...")
+            results = self._split_local(input_path, split_segments)
+            for completed, (out_file, success, error) in enumerate(results, 1):
                 if success:
                     success_count += 1
-                    log.success(f"[{completed}/{len(segments)}] Created {msg}")
+                    log.success(f"[{completed}/{len(split_segments)}] Created {Path(out_file).name}")
                 else:
-                    log.error(f"[{completed}/{len(segments)}] Failed: {msg}")
+                    log.error(f"[{completed}/{len(split_segments)}] Failed: {error}")
         
         log.success(f"Completed: {success_count}/{len(segments)} segments")
 
     def handle_download_if_needed(self, path):
         """Checks if input is URL, downloads if so."""
         path = normalize_path(path)
+        source = classify_source(path)
         
-        if not (path.startswith("http") or TDLHandler.is_telegram_link(path)):
+        # An existing file is local even if its name happens to start with "http"
+        if source == "local" or os.path.isfile(path):
             return path
         
-        if TDLHandler.is_telegram_link(path):
+        # One download per URL at a time; a repeat waits and then reuses the file
+        with self._url_lock(path):
+            cached = self._cached_download(path)
+            if cached:
+                log.info(f"Reusing download: {cached}")
+                return cached
+            
+            local_path = self._download_url(path, source)
+            if local_path:
+                self._remember_download(path, local_path)
+            return local_path
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        """Get (or create) the lock serializing downloads of one URL."""
+        with self._url_cache_guard:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _remember_download(self, url: str, local_path):
+        """Add a download to the URL cache, forgetting the oldest ones beyond the byte budget."""
+        try:
+            size = os.stat(local_path).st_size
+        except OSError:
+            return
+        with self._url_cache_guard:
+            _, old_size = self._url_cache.pop(url, (None, 0))
+            self._url_cache[url] = (local_path, size)
+            self._url_cache_bytes += size - old_size
+            # The newest entry stays even alone over budget, so an immediate repeat reuses it
+            while self._url_cache_bytes > self._url_cache_budget and len(self._url_cache) > 1:
+                _, (_, old_size) = self._url_cache.popitem(last=False)
+                self._url_cache_bytes -= old_size
+
+    def _cached_download(self, url: str):
+        """Return the earlier download of url if its file is still there, unchanged in size."""
+        with self._url_cache_guard:
+            entry = self._url_cache.get(url)
+            if entry is None:
+                return None
+            local_path, size = entry
+            try:
+                if size > 0 and os.stat(local_path).st_size == size:
+                    self._url_cache.move_to_end(url)
+                    return local_path
+            except OSError:
+                pass
+            del self._url_cache[url]
+            self._url_cache_bytes -= size
+            return None
+
+    def _download_url(self, path, source=None):
+        """
+        Download a URL or Telegram link to a local file.
+        
+        Args:
+            source: classify_source(path), if the caller already has it
+        """
+        output_name = self._download_name(path)
+        
+        if (source or classify_source(path)) == "tdl":
             log.info("Detected Telegram link...")
             self.tdl.start_serve(path)
             try:
@@ -479,7 +682,6 @@ class VideoCLI:
                     log.error("Failed to retrieve download link from TDL.")
                     return None
                 
-                output_name = "downloaded_video.mp4"
                 log.info(f"Downloading from: {direct_link}")
                 if self.downloader.smart_download(direct_link, output_name):
                     return output_name
@@ -489,30 +691,76 @@ class VideoCLI:
             finally:
                 self.tdl.stop_serve()
         else:
-            output_name = "downloaded_video.mp4"
             if self.downloader.smart_download(path, output_name):
                 return output_name
             else:
                 log.error("Download failed.")
                 return None
 
-    def do_join_flow_multi(self, files: list):
-        """Join multiple videos into one."""
-        inputs = []
+    def _download_name(self, url: str) -> str:
+        """Local file name for a downloaded URL (distinct URLs never collide)."""
+        return f"downloaded_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.mp4"
+
+    def _stream_or_download(self, url: str):
+        """Keep a seekable URL for FFmpeg to read directly; download it otherwise."""
+        if self.downloader.supports_ranges(url):
+            log.info(f"Reading directly from URL: {url}")
+            return url
+        return self.handle_download_if_needed(url)
+
+    def _output_location(self, path: str):
+        """Get (folder, stem) for outputs derived from an input path or URL."""
+        if classify_source(path) == "local":
+            input_file = Path(path)
+            return input_file.parent, input_file.stem
+        return Path("."), Path(self._download_name(path)).stem
+
+    def _resolve_inputs(self, files: list, stream: bool = False) -> list:
+        """
+        Turn inputs into local paths, keeping their order (failed inputs are dropped).
+        Telegram links share one TDL server so they resolve one at a time;
+        plain URLs download in parallel.
         
-        for f in files:
-            local_path = self.handle_download_if_needed(f)
-            if local_path:
-                inputs.append(local_path)
+        Args:
+            stream: Pass seekable plain URLs through for FFmpeg to read instead of downloading them
+        """
+        resolve_url = self._stream_or_download if stream else self.handle_download_if_needed
+        paths = [normalize_path(f) for f in files]
+        resolved = [None] * len(paths)
+        url_jobs = {}
+        
+        for i, path in enumerate(paths):
+            if classify_source(path) == "http":
+                url_jobs[i] = path
+            else:
+                resolved[i] = self.handle_download_if_needed(path)
+        
+        if len(url_jobs) == 1:
+            for i, path in url_jobs.items():
+                resolved[i] = resolve_url(path)
+        elif url_jobs:
+            workers = min(len(url_jobs), self.download_max_connection or DEFAULT_AUTO_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(resolve_url, p): i for i, p in url_jobs.items()}
+                for future in as_completed(futures):
+                    try:
+                        resolved[futures[future]] = future.result()
+                    except Exception as e:
+                        log.error("Download failed", details=str(e))
+        
+        return [p for p in resolved if p]
+
+    def do_join_flow_multi(self, files: list):
+        """Join multiple videos into one (seekable URLs are read in place, not downloaded)."""
+        from InquirerPy import inquirer
+        inputs = self._resolve_inputs(files, stream=True)
         
         if len(inputs) < 2:
             if len(inputs) == 1:
                 log.info(f"First video: {Path(inputs[0]).name}")
             
             second_input = inquirer.text(message="Second video path / URL:").execute()
-            second_path = self.handle_download_if_needed(normalize_path(second_input))
-            if second_path:
-                inputs.append(second_path)
+            inputs.extend(self._resolve_inputs([second_input], stream=True))
             
             if len(inputs) < 2:
                 log.error("Need at least 2 videos to join.")
@@ -524,12 +772,9 @@ class VideoCLI:
                 break
             
             additional_input = inquirer.text(message="Video path / URL:").execute()
-            local_path = self.handle_download_if_needed(normalize_path(additional_input))
-            if local_path:
-                inputs.append(local_path)
+            inputs.extend(self._resolve_inputs([additional_input], stream=True))
 
-        first_file = Path(inputs[0])
-        source_folder = first_file.parent
+        source_folder, first_stem = self._output_location(inputs[0])
         
         output_name = inquirer.text(
             message="Output filename (empty = name_join.mp4):",
@@ -537,7 +782,7 @@ class VideoCLI:
         ).execute()
         
         if not output_name.strip():
-            output_name = f"{first_file.stem}_join.mp4"
+            output_name = f"{first_stem}_join.mp4"
         else:
             output_name = ensure_output_extension(output_name)
         
@@ -555,37 +800,20 @@ class VideoCLI:
 
     def do_compress_flow_parallel(self, files: list):
         """Compress multiple videos with parallel processing."""
+        from InquirerPy import inquirer
         log.section("COMPRESS VIDEO")
         log.detail("Files to process", str(len(files)))
         log.detail("Parallel workers", str(self.max_queue))
         log.detail("Compression level", self.compression_level)
         
-        def compress_task(file_path):
-            file_path = normalize_path(file_path)
-            local_path = self.handle_download_if_needed(file_path)
-            if not local_path:
-                return (file_path, False, "Download failed")
-            
-            input_file = Path(local_path)
-            source_folder = input_file.parent
-            output_name = f"{input_file.stem}_compressed.mp4"
-            output_path = str(source_folder / output_name)
-            
-            try:
-                self.ffmpeg.compress_video(local_path, output_path, compression_level=self.compression_level)
-                return (input_file.name, True, output_name)
-            except Exception as e:
-                return (input_file.name, False, str(e))
-        
         # Single file - ask for output name
         if len(files) == 1:
-            file_path = normalize_path(files[0])
-            local_path = self.handle_download_if_needed(file_path)
-            if not local_path:
+            resolved = self._resolve_inputs(files, stream=True)
+            if not resolved:
                 return
+            local_path = resolved[0]
             
-            input_file = Path(local_path)
-            source_folder = input_file.parent
+            source_folder, stem = self._output_location(local_path)
             
             output_name = inquirer.text(
                 message="Output name (empty = replace source):",
@@ -593,7 +821,7 @@ class VideoCLI:
             ).execute()
             
             if not output_name.strip():
-                output_name = f"{input_file.stem}.mp4"
+                output_name = f"{stem}.mp4"
             else:
                 output_name = ensure_output_extension(output_name)
             
@@ -606,100 +834,316 @@ class VideoCLI:
                 log.error(f"Compression failed", details=str(e))
             return
         
-        # Multiple files - process in parallel
-        with ThreadPoolExecutor(max_workers=self.max_queue) as executor:
-            futures = {executor.submit(compress_task, f): f for f in files}
-            completed = 0
-            success_count = 0
-            
-            for future in as_completed(futures):
+        # Resolve URLs first (TDL serve is shared state), then encode in parallel;
+        # seekable URLs are encoded straight from the network
+        local_paths = self._resolve_inputs(files, stream=True)
+        completed = len(files) - len(local_paths)
+        if completed:
+            log.error(f"[{completed}/{len(files)}] Failed: {completed} input(s) could not be downloaded")
+        
+        # Multiple files - compress in parallel; output names are worked out here
+        # so the workers only wait on FFmpeg
+        jobs = [self._compress_job(p) for p in local_paths]
+        success_count = 0
+        executor = self._get_executor()
+        futures = {executor.submit(self._compress_group, group): group for group in self._plan_compress_groups(jobs)}
+        
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(output_path, False, str(e)) for _, _, output_path, _ in group]
+            for (_, name, _, output_name), (_, success, error) in zip(group, results):
                 completed += 1
-                name, success, msg = future.result()
                 if success:
                     success_count += 1
-                    log.success(f"[{completed}/{len(files)}] Created {msg}")
+                    log.success(f"[{completed}/{len(files)}] Created {output_name}")
                 else:
-                    log.error(f"[{completed}/{len(files)}] Failed: {name} - {msg}")
+                    log.error(f"[{completed}/{len(files)}] Failed: {name} - {error}")
         
         log.success(f"Batch completed: {success_count}/{len(files)} files")
 
+    def _compress_job(self, local_path: str) -> tuple:
+        """
+        Plan one batch compression.
+        
+        Returns:
+            (input_path, display_name, output_path, output_name)
+        """
+        if classify_source(local_path) == "local":
+            source_folder, name = os.path.split(local_path)
+            stem = os.path.splitext(name)[0]
+        else:
+            source_folder, stem = self._output_location(local_path)
+            name = local_path
+        output_name = f"{stem}_compressed.mp4"
+        return local_path, name, os.path.join(source_folder, output_name), output_name
+
+    def _plan_compress_groups(self, jobs: list) -> list:
+        """
+        Group planned compressions: small local files share one FFmpeg run (in groups of
+        up to COMPRESS_BATCH_FILES), everything else is compressed on its own. Hardware
+        encoders hold a session per output, so with one selected nothing is grouped.
+        """
+        _, is_hardware, _ = self.ffmpeg.compress_encoder(self.compression_level)
+        if is_hardware:
+            return [[job] for job in jobs]
+        groups, small = [], []
+        for job in jobs:
+            local_path = job[0]
+            try:
+                is_small = classify_source(local_path) == "local" and os.path.getsize(local_path) <= COMPRESS_BATCH_MAX_BYTES
+            except OSError:
+                is_small = False
+            if is_small:
+                small.append(job)
+            else:
+                groups.append([job])
+        groups.extend(small[i:i + COMPRESS_BATCH_FILES] for i in range(0, len(small), COMPRESS_BATCH_FILES))
+        return groups
+
+    def _compress_group(self, group: list) -> list:
+        """
+        Compress one planned group on a pool worker.
+        
+        Returns:
+            List of (output_path, success, error_message) in the order of group
+        """
+        if len(group) == 1:
+            local_path, _, output_path, _ = group[0]
+            self.ffmpeg.compress_video(local_path, output_path, compression_level=self.compression_level)
+            return [(output_path, True, "")]
+        return self.ffmpeg.compress_batch(
+            [(local_path, output_path) for local_path, _, output_path, _ in group],
+            compression_level=self.compression_level
+        )
+
     def process_json_input(self, action):
         """Process batch operations from JSON file."""
-        json_files = [f for f in os.listdir('.') if f.endswith('.json')]
+        from InquirerPy import inquirer
+        # Name check first; is_file() uses the dirent type and rarely needs a stat
+        with os.scandir('.') as entries:
+            json_files = [e.name for e in entries if e.name.endswith('.json') and e.is_file()]
         if not json_files:
             log.warning("No JSON files found in current directory.")
             return
-            
-        queue_file = inquirer.select(
-            message="Select queue file:",
-            choices=json_files
-        ).execute()
+        
+        if len(json_files) == 1:
+            queue_file = json_files[0]
+        else:
+            json_files.sort()
+            queue_file = inquirer.select(
+                message="Select queue file:",
+                choices=json_files
+            ).execute()
         
         try:
-            with open(queue_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            log.info(f"Processing {len(data)} items from {queue_file}...")
+            log.info(f"Processing items from {queue_file}...")
             
-            for item in data:
-                self._process_json_item(item)
+            # Items overlap (one's resolve or cut while another downloads); each item's
+            # downloader already fans out, so only half the queue runs items
+            workers = max(1, self.max_queue // 2)
+            # TDL serves one link per process, so Telegram groups take turns on two handlers:
+            # a second server on a free port resolves the next link while a group downloads
+            lookahead = TDLHandler(port=free_local_port())
+            handlers = Queue()
+            handlers.put(self.tdl)
+            handlers.put(lookahead)
+            # Groups in flight (one more than workers, so the next is ready when a worker frees up);
+            # also bounds how far the reader runs ahead of the downloads
+            slots = threading.BoundedSemaphore(workers + 1)
+            
+            count = 0
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    def submit(group):
+                        slots.acquire()
+                        source = self._json_item_source(group[0])
+                        tdl = handlers.get() if source and classify_source(source) == "tdl" else None
+                        try:
+                            prepared = self._prepare_json_group(group, tdl)
+                            if prepared is None and tdl is lookahead and not lookahead.serving:
+                                prepared, tdl = self._retry_on_main_tdl(group, lookahead, handlers)
+                        except Exception as e:
+                            log.error("Error processing item", details=str(e))
+                            prepared = None
+                        if prepared is None:
+                            self._release_json_group(tdl, handlers, slots)
+                            return
+                        valid_items, final_url = prepared
+                        executor.submit(self._download_json_group, valid_items, final_url, tdl, handlers, slots)
+                    
+                    # Consecutive items with the same input form one job, so its link is resolved once
+                    group, group_source = [], None
+                    for item in self._iter_queue_items(queue_file):
+                        source = self._json_item_source(item)
+                        if group and (source is None or source != group_source):
+                            submit(group)
+                            group = []
+                        group.append(item)
+                        group_source = source
+                        count += 1
+                    if group:
+                        submit(group)
+            finally:
+                self.tdl.stop_serve()
+                lookahead.stop_serve()
+            
+            log.info(f"Processed {count} items from {queue_file}")
                         
         except json.JSONDecodeError as e:
             log.error(f"Invalid JSON format", details=str(e))
         except Exception as e:
             log.error(f"Error processing JSON", details=str(e))
 
-    def _process_json_item(self, item):
-        """Process a single item from JSON batch."""
-        input_url = item.get("input")
-        output_base = item.get("output")
-        segments = item.get("segments", [])
-        
-        if not input_url or not output_base:
-            log.warning("Skipping invalid item (missing input or output).")
+    def _iter_queue_items(self, queue_file):
+        """
+        Yield items of a JSON queue array.
+        Large files are streamed one item at a time with ijson when installed,
+        so the first item starts before the file is fully parsed. Otherwise the
+        whole file is parsed with orjson if available, else the stdlib json.
+        """
+        ijson = None
+        st = os.stat(queue_file)
+        if st.st_size >= STREAM_QUEUE_MIN_BYTES:
+            try:
+                import ijson
+            except ImportError:
+                pass
+        if ijson is None:
+            yield from self._load_queue_file(queue_file, st)
             return
         
-        input_url = normalize_path(input_url)
-            
-        log.section(f"Processing: {output_base}")
+        with open(queue_file, 'rb') as f:
+            try:
+                yield from ijson.items(f, 'item')
+            except ijson.JSONError as e:
+                raise json.JSONDecodeError(str(e), "", 0) from e
+
+    def _load_queue_file(self, queue_file, st=None):
+        """
+        Parse a whole JSON queue file (orjson raises a json.JSONDecodeError subclass).
         
-        final_url = input_url
-        is_tdl = TDLHandler.is_telegram_link(input_url)
+        Args:
+            st: os.stat result of queue_file if the caller already has it
+        """
+        if st is None:
+            st = os.stat(queue_file)
+        return _parse_queue_file(os.path.abspath(queue_file), st.st_mtime_ns, st.st_size)
+
+    def _json_item_source(self, item):
+        """Get the normalized input of a batch item (None if it has none)."""
+        if isinstance(item, dict) and isinstance(item.get("input"), str):
+            return normalize_path(item["input"]) or None
+        return None
+
+    def _prepare_json_group(self, items, tdl):
+        """
+        Validate consecutive JSON batch items that share one input and resolve that input.
+        Runs on the reading thread, so the next link resolves while workers download.
         
-        if is_tdl:
-            log.info("Resolving Telegram link...")
-            self.tdl.start_serve(input_url)
-            resolved = self.tdl.get_download_link()
-            if not resolved:
+        Args:
+            tdl: TDLHandler that serves the group's Telegram link until the download finishes
+                 (None for other inputs)
+        
+        Returns:
+            (valid_items, final_url), or None if there is nothing to download
+        """
+        valid_items = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get("input") or not item.get("output"):
+                log.warning("Skipping invalid item (missing input or output).")
+            else:
+                valid_items.append(item)
+        if not valid_items:
+            return None
+        
+        final_url = normalize_path(valid_items[0]["input"])
+        if tdl is not None:
+            log.info(f"Resolving Telegram link (used by {len(valid_items)} item(s))...")
+            tdl.start_serve(final_url)
+            final_url = tdl.get_download_link()
+            if not final_url:
                 log.error("Failed to resolve TDL link.")
-                self.tdl.stop_serve()
-                return
-            final_url = resolved
+                return None
+        return valid_items, final_url
+
+    def _retry_on_main_tdl(self, items, lookahead, handlers: Queue):
+        """
+        Resolve a group whose link the look-ahead TDL server could not serve on the main one.
+        If the main server succeeds, the second server is what failed (tdl may refuse a second
+        instance), so it is retired and Telegram groups resolve one at a time from then on.
         
+        Returns:
+            (prepared group or None, handler now held by the group)
+        """
+        tdl = handlers.get()
+        prepared = self._prepare_json_group(items, tdl)
+        if prepared is None:
+            # The link itself is bad; keep both servers
+            tdl.stop_serve()
+            handlers.put(tdl)
+            return None, lookahead
+        log.warning("Second TDL server unavailable, resolving Telegram links one at a time.")
+        lookahead.stop_serve()
+        return prepared, tdl
+
+    def _release_json_group(self, tdl, handlers: Queue, slots: threading.BoundedSemaphore):
+        """Free what a batch group held: its group slot and, for Telegram inputs, the TDL handler."""
+        if tdl is not None:
+            tdl.stop_serve()
+            handlers.put(tdl)
+        slots.release()
+
+    def _download_json_group(self, items, final_url, tdl, handlers: Queue, slots: threading.BoundedSemaphore):
+        """
+        Download a prepared group on a pool worker, then release its slot and TDL handler.
+        Each item splits the connections by the groups downloading when it starts, so a
+        group running alone gets all of them.
+        """
+        with self._json_groups_lock:
+            self._json_groups_active += 1
         try:
-            download_segments = []
-            for i, seg in enumerate(segments):
-                start = seg.get("start")
-                end = seg.get("end")
-                if not start or not end:
-                    continue
-                
-                start_sec = time_str_to_seconds(str(start))
-                end_sec = time_str_to_seconds(str(end))
-                out_file = ensure_output_extension(f"{output_base}_{i+1}")
-                download_segments.append((start_sec, end_sec, out_file))
-            
-            if download_segments:
-                log.info(f"Processing {len(download_segments)} segments...")
-                results = self.downloader.batch_download_segments(final_url, download_segments)
-                success_count = sum(1 for _, success in results if success)
-                log.success(f"Completed: {success_count}/{len(results)} segments")
-            
-        except Exception as e:
-            log.error(f"Error processing item", details=str(e))
+            for item in items:
+                with self._json_groups_lock:
+                    share = self._json_groups_active
+                try:
+                    self._download_json_item(item, final_url, share)
+                except Exception as e:
+                    log.error(f"Error processing item", details=str(e))
         finally:
-            if is_tdl:
-                self.tdl.stop_serve()
+            with self._json_groups_lock:
+                self._json_groups_active -= 1
+            self._release_json_group(tdl, handlers, slots)
+
+    def _download_json_item(self, item, final_url, share=1):
+        """
+        Download the segments of one JSON batch item from its resolved URL.
+        
+        Args:
+            share: Groups downloading at once on the shared Downloader (splits its connections)
+        """
+        output_base = item.get("output")
+        segments = item.get("segments", [])
+        
+        log.section(f"Processing: {output_base}")
+        
+        # Parse and validate every range up front; an invalid one never takes a download slot
+        numbered = [(i, str(seg.get("start")), str(seg.get("end"))) for i, seg in enumerate(segments) if seg.get("start") and seg.get("end")]
+        download_segments = []
+        for (i, start, end), (start_sec, end_sec) in zip(numbered, time_strs_to_seconds((s, e) for _, s, e in numbered)):
+            if end_sec <= start_sec:
+                log.warning(f"Invalid range {start}-{end}, skipping.")
+                continue
+            out_file = f"{output_base}_{i+1}{DEFAULT_EXTENSION}"
+            download_segments.append((start_sec, end_sec, out_file))
+        
+        if download_segments:
+            log.info(f"Processing {len(download_segments)} segments...")
+            results = self.downloader.batch_download_segments(final_url, download_segments, share)
+            success_count = sum(1 for _, success in results if success)
+            log.success(f"Completed: {success_count}/{len(results)} segments")
 
 
 if __name__ == "__main__":
@@ -13,7 +13,10 @@ import time
 import shutil
 import tempfile
 import json
+import hashlib
+import threading
 import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Optional
 from concurrent.futures import ThreadPoolExecutor
@@ -135,6 +138,94 @@ class TestResult:
         return self.failed == 0
 
 
+class RangeServer:
+    """Local HTTP server with byte ranges, ETags and If-Range, for download tests."""
+    def __init__(self, ranges: bool = True, rate: Optional[int] = None):
+        self.ranges = ranges  # False: ignore Range and don't advertise Accept-Ranges
+        self.rate = rate  # bytes/s per connection, None for unlimited
+        self.files = {}  # path -> (content, etag)
+        self.requests = []  # (method, path, headers)
+        self.active = 0  # bodies being sent right now
+        self.peak = 0  # most bodies sent at once (reset to 0 between checks)
+        self._lock = threading.Lock()
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_HEAD(self):
+                server._respond(self, send_body=False)
+            
+            def do_GET(self):
+                server._respond(self, send_body=True)
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def serve(self, path: str, content: bytes, etag: Optional[str] = None) -> str:
+        """Publish content at path (replacing what was there); returns its URL."""
+        self.files[path] = (content, etag or f'"{hashlib.sha1(content).hexdigest()}"')
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+    
+    def _respond(self, handler, send_body: bool):
+        path = handler.path.split("?")[0]
+        self.requests.append((handler.command, path, dict(handler.headers)))
+        if path not in self.files:
+            handler.send_error(404)
+            return
+        
+        content, etag = self.files[path]
+        size = len(content)
+        first, last, status = 0, size - 1, 200
+        range_header = handler.headers.get("Range", "")
+        if_range = handler.headers.get("If-Range")
+        # A stale If-Range turns the request into a full download
+        if self.ranges and range_header.startswith("bytes=") and if_range in (None, etag):
+            start, _, end = range_header[6:].partition("-")
+            first = int(start)
+            last = min(int(end), size - 1) if end else size - 1
+            if first >= size:
+                handler.send_response(416)
+                handler.send_header("Content-Range", f"bytes */{size}")
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+            status = 206
+        
+        handler.send_response(status)
+        if self.ranges:
+            handler.send_header("Accept-Ranges", "bytes")
+        handler.send_header("ETag", etag)
+        handler.send_header("Content-Length", str(last - first + 1))
+        if status == 206:
+            handler.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        handler.end_headers()
+        if send_body:
+            with self._lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                self._send(handler.wfile, content[first:last + 1])
+            finally:
+                with self._lock:
+                    self.active -= 1
+    
+    def _send(self, wfile, body: bytes):
+        if self.rate is None:
+            wfile.write(body)
+            return
+        # Pause before each write, so a body counts as active only until its last byte is out
+        step = 64 * 1024
+        for i in range(0, len(body), step):
+            time.sleep(min(step, len(body) - i) / self.rate)
+            wfile.write(body[i:i + step])
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
 def get_ffmpeg_handler():
     """Get FFmpegHandler instance."""
     from core.config import load_config
@@ -197,6 +288,34 @@ def test_split_video(results: TestResult):
     except Exception as e:
         results.add("Split 3 segments", False, str(e))
 
+    # Test 4: Several segments in one FFmpeg run
+    batch = [(1, 2, str(config.temp_dir / "split_batch_0.mp4")),
+             (2, 4, str(config.temp_dir / "split_batch_1.mp4")),
+             (4, 5, str(config.temp_dir / "split_batch_2.mp4"))]
+    try:
+        outcome = handler.split_video_batch(str(config.test_video), batch)
+        lengths = [handler.get_duration(output) if success else 0.0 for output, success, _ in outcome]
+        ok = all(success for _, success, _ in outcome) and all(
+            abs(length - (end - start)) < 1.0 for (start, end, _), length in zip(batch, lengths)
+        )
+        results.add("Split batch", ok, ", ".join(f"{length:.1f}s" for length in lengths))
+    except Exception as e:
+        results.add("Split batch", False, str(e))
+
+    # Test 5: One unwritable output fails the run; the retry keeps the others and names the bad one
+    bad_output = str(config.temp_dir / "missing_dir" / "split_bad.mp4")
+    batch = [(0, 1, str(config.temp_dir / "split_retry_0.mp4")),
+             (1, 2, bad_output),
+             (2, 3, str(config.temp_dir / "split_retry_2.mp4"))]
+    try:
+        outcome = handler.split_video_batch(str(config.test_video), batch)
+        flags = [success for _, success, _ in outcome]
+        error = outcome[1][2]
+        results.add("Split batch bad segment", flags == [True, False, True] and bool(error),
+                    error[:60] or "no error reported")
+    except Exception as e:
+        results.add("Split batch bad segment", False, str(e))
+
 
 # =============================================================================
 # JOIN VIDEO TESTS
@@ -235,6 +354,18 @@ def test_join_video(results: TestResult):
             results.add("Join 3 files", False, "Output not created")
     except Exception as e:
         results.add("Join 3 files", False, str(e))
+    
+    # Test 3: Names with quotes and spaces survive the concat list piped on stdin
+    quoted = config.temp_dir / "it's a clip.mp4"
+    output3 = str(config.temp_dir / "joined_quoted.mp4")
+    try:
+        shutil.copy(config.test_video, quoted)
+        handler.join_videos([str(quoted), str(config.test_video)], output3)
+        expected = 2 * handler.get_duration(config.test_video)
+        joined = handler.get_duration(output3) if Path(output3).exists() else 0.0
+        results.add("Join quoted file names", abs(joined - expected) < 1.0, f"Duration: {joined:.1f}s (expected {expected:.1f}s)")
+    except Exception as e:
+        results.add("Join quoted file names", False, str(e))
 
 
 # =============================================================================
@@ -330,6 +461,56 @@ def test_compress_video(results: TestResult):
         )
 
 
+def test_compress_batch(results: TestResult):
+    """Test that batched compression keeps the streams compress_video keeps."""
+    print("\n--- BATCH COMPRESS TESTS ---")
+    
+    import subprocess
+    handler = get_ffmpeg_handler()
+    handler.override_encoding = "libx264"  # batching only applies to software encoders
+    source = config.temp_dir / "two_audio.mp4"
+    
+    def audio_channels(path):
+        info = handler.get_video_info(path) or {}
+        return [st.get("channels") for st in info.get("streams", []) if st.get("codec_type") == "audio"]
+    
+    try:
+        # Stereo first, 5.1 second: FFmpeg's own selection keeps only the 5.1 track
+        subprocess.run([
+            handler.ffmpeg, "-y", "-v", "error",
+            "-f", "lavfi", "-i", "testsrc=duration=3:size=320x240:rate=25",
+            "-f", "lavfi", "-i", "aevalsrc=0|0:d=3",
+            "-f", "lavfi", "-i", "aevalsrc=0|0|0|0|0|0:d=3",
+            "-map", "0:v", "-map", "1:a", "-map", "2:a",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac",
+            str(source)
+        ], capture_output=True, check=True)
+        
+        single = config.temp_dir / "two_audio_single.mp4"
+        handler.compress_video(str(source), str(single), show_progress=False, compression_level="low")
+        expected = audio_channels(single)
+        
+        jobs = [
+            (str(source), str(config.temp_dir / "two_audio_batch.mp4")),
+            (str(config.test_video), str(config.temp_dir / "test_video_batch.mp4")),
+        ]
+        batch = handler.compress_batch(jobs, compression_level="low")
+        results.add("Batch compress outputs", all(ok for _, ok, _ in batch), str([error for _, ok, error in batch if not ok]))
+        
+        batched = audio_channels(batch[0][0])
+        results.add("Batch keeps compress_video audio", expected == [6] and batched == expected,
+                    f"single: {expected}, batch: {batched}")
+        
+        durations = [handler.get_duration(out) for out, _, _ in batch]
+        results.add(
+            "Batch outputs follow their inputs",
+            abs(durations[0] - 3) < 0.5 and abs(durations[1] - handler.get_duration(config.test_video)) < 0.5,
+            f"{durations[0]:.1f}s, {durations[1]:.1f}s"
+        )
+    except Exception as e:
+        results.add("Batch compress", False, str(e))
+
+
 # =============================================================================
 # PARALLEL DOWNLOAD TESTS
 # =============================================================================
@@ -499,6 +680,374 @@ def test_multiple_files_input(results: TestResult):
     results.add("Multiple paths parsing", len(parsed) == 2, f"Parsed: {len(parsed)} paths")
 
 
+# =============================================================================
+# SETTINGS TESTS
+# =============================================================================
+
+# Runs in a child process so the test's .env is the only one that process ever loads
+SAVE_ENV_SCRIPT = """
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import core.config as cfg
+cfg.ENV_PATH = Path(sys.argv[2])
+cfg.load_config()
+cfg.save_env("VT_TEST_FIRST", "2")
+cfg.save_env("VT_TEST_NEW", "x")
+print(cfg.get_env("VT_TEST_FIRST"), cfg.get_env("VT_TEST_NEW"))
+"""
+
+
+def test_save_env(results: TestResult):
+    """Test .env updates keep comments and key order."""
+    print("\n--- SAVE ENV TESTS ---")
+    
+    import subprocess
+    env_path = config.temp_dir / "test.env"
+    original = "# Header comment\nVT_TEST_FIRST=1\n\n# Second comment\nVT_TEST_SECOND=a\n"
+    env_path.write_text(original, encoding="utf-8")
+    child_env = {k: v for k, v in os.environ.items() if not k.startswith("VT_TEST_")}
+    
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", SAVE_ENV_SCRIPT, str(PROJECT_ROOT), str(env_path)],
+            capture_output=True, text=True, env=child_env, timeout=60
+        )
+        content = env_path.read_text(encoding="utf-8")
+        expected = original.replace("VT_TEST_FIRST=1", "VT_TEST_FIRST=2") + "VT_TEST_NEW=x\n"
+        results.add("save_env keeps comments and order", content == expected, repr(content))
+        # load_config may report on setup first; the script's own output is the last line
+        last_line = (result.stdout.strip().splitlines() or [""])[-1]
+        results.add("save_env visible to get_env", last_line.split() == ["2", "x"],
+                    last_line or result.stderr.strip()[-200:])
+    except Exception as e:
+        results.add("save_env", False, str(e))
+
+
+# =============================================================================
+# HELPER TESTS
+# =============================================================================
+
+def test_output_extension(results: TestResult):
+    """Test output name extension handling."""
+    print("\n--- OUTPUT NAME TESTS ---")
+    
+    from core.config import ensure_output_extension
+    
+    cases = [
+        (("clip",), "clip.mp4"),
+        (("clip.mp4",), "clip.mp4"),
+        (("clip.MP4",), "clip.MP4"),
+        (("clip.mkv",), "clip.mkv.mp4"),
+        (("clip", ".MKV"), "clip.MKV"),
+        (("clip.mkv", ".MKV"), "clip.mkv"),
+        (("",), ""),
+    ]
+    failed = [args for args, want in cases if ensure_output_extension(*args) != want]
+    results.add("ensure_output_extension", not failed, f"Failed: {failed}" if failed else f"{len(cases)} cases")
+
+
+def test_time_conversion(results: TestResult):
+    """Test batch conversion of segment times."""
+    print("\n--- TIME CONVERSION TESTS ---")
+    
+    from utils.helpers import time_strs_to_seconds
+    
+    seconds = time_strs_to_seconds([("00.30", "01.20"), ("90", "1:30"), ("0:01:05", ""), ("1:00", "0.59")])
+    expected = [(1800, 4800), (90, 90), (65, 0), (60, 3540)]
+    results.add("time_strs_to_seconds", seconds == expected, str(seconds))
+    results.add("time_strs_to_seconds (empty)", time_strs_to_seconds([]) == [])
+
+
+def test_source_classification(results: TestResult):
+    """Test input source classification."""
+    print("\n--- SOURCE CLASSIFICATION TESTS ---")
+    
+    from utils.path_utils import classify_source
+    
+    cases = [
+        ("https://t.me/somechannel/123", "tdl"),
+        ("https://t.me/c/1234567890/42?single", "tdl"),
+        ("https://example.com/video.mp4", "http"),
+        ("http://localhost:8080/file", "http"),
+        (str(config.test_video), "local"),
+        ("relative/clip.mp4", "local"),
+    ]
+    failed = [path for path, want in cases if classify_source(path) != want]
+    results.add("classify_source", not failed, f"Failed: {failed}" if failed else f"{len(cases)} cases")
+
+
+def test_inspect_input(results: TestResult):
+    """Test one-step input normalization and classification."""
+    print("\n--- INSPECT INPUT TESTS ---")
+    
+    from utils.path_utils import inspect_input
+    
+    info = inspect_input(f'"{config.test_video}"')
+    results.add(
+        "inspect_input (quoted local path)",
+        info.source == "local" and not info.is_url and not info.is_tdl
+        and Path(info.path) == config.test_video.resolve()
+        and info.folder == config.test_video.resolve().parent and info.stem == config.test_video.stem,
+        f"{info.source}, {info.folder}, {info.stem}"
+    )
+    
+    info = inspect_input("https://example.com/video.mp4")
+    results.add(
+        "inspect_input (URL)",
+        info.is_url and not info.is_tdl and info.folder == Path(".") and info.stem == "output",
+        f"{info.source}, {info.folder}, {info.stem}"
+    )
+    
+    info = inspect_input("https://t.me/somechannel/123", url_stem="tg")
+    results.add(
+        "inspect_input (Telegram)",
+        info.is_url and info.is_tdl and info.stem == "tg",
+        f"{info.source}, {info.folder}, {info.stem}"
+    )
+
+
+# =============================================================================
+# RANGE DOWNLOAD TESTS
+# =============================================================================
+
+def test_range_download(results: TestResult):
+    """Test segment downloads over parallel byte ranges from a local server."""
+    print("\n--- RANGE DOWNLOAD TESTS ---")
+    
+    downloader = get_downloader()
+    downloader.set_max_workers(2)
+    handler = downloader.ffmpeg_handler
+    duration = handler.get_duration(config.test_video)
+    server = RangeServer()
+    url = server.serve("/range_source.mp4", config.test_video.read_bytes())
+    
+    # Both segments cover most of the source, so each is fetched as byte ranges
+    segments = [
+        (0.0, duration * 0.8, str(config.temp_dir / "range_seg_1.mp4")),
+        (duration * 0.1, duration * 0.9, str(config.temp_dir / "range_seg_2.mp4")),
+    ]
+    try:
+        outcome = downloader.batch_download_segments(url, segments)
+        ok = all(success and Path(output).exists() for output, success in outcome)
+        lengths = [handler.get_duration(output) if Path(output).exists() else 0.0 for output, _ in outcome]
+        results.add("Range segment download", ok and all(length > 0 for length in lengths),
+                    ", ".join(f"{length:.1f}s" for length in lengths))
+        
+        heads = sum(1 for method, path, _ in server.requests if method == "HEAD" and path == "/range_source.mp4")
+        results.add("Range probe shared by segments", heads == 1, f"{heads} HEAD request(s)")
+    except Exception as e:
+        results.add("Range segment download", False, str(e))
+    finally:
+        server.close()
+
+
+def test_auto_workers(results: TestResult):
+    """Test that auto mode adds connections while they keep speeding up downloads."""
+    print("\n--- AUTO WORKERS TESTS ---")
+    
+    from core.downloader import AUTO_WORKERS
+    downloader = get_downloader()
+    downloader.set_max_workers(AUTO_WORKERS)
+    handler = downloader.ffmpeg_handler
+    duration = handler.get_duration(config.test_video)
+    content = config.test_video.read_bytes()
+    # Each connection is capped, so more of them finish sooner (a single one takes ~2s)
+    server = RangeServer(rate=max(64 * 1024, len(content) // 2))
+    url = server.serve("/auto_source.mp4", content)
+    
+    peaks = []
+    try:
+        for i in range(3):
+            server.peak = 0
+            output = config.temp_dir / f"auto_seg_{i}.mp4"
+            ok = downloader.download_segment(url, 0.0, duration * 0.9, str(output))
+            if not ok:
+                break
+            peaks.append(server.peak)
+        results.add("Auto workers downloads", len(peaks) == 3, f"{len(peaks)}/3")
+        results.add("Auto workers climb while faster",
+                    len(peaks) == 3 and peaks == sorted(peaks) and peaks[-1] > peaks[0],
+                    " → ".join(str(peak) for peak in peaks) + " connections")
+    except Exception as e:
+        results.add("Auto workers downloads", False, str(e))
+    finally:
+        server.close()
+
+
+def test_single_pass_download(results: TestResult):
+    """Test several segments of a source without byte ranges, read in one pass."""
+    print("\n--- SINGLE PASS DOWNLOAD TESTS ---")
+    
+    import subprocess
+    downloader = get_downloader()
+    handler = downloader.ffmpeg_handler
+    duration = handler.get_duration(config.test_video)
+    server = RangeServer(ranges=False)
+    
+    # Index first, so the source can be read front to back without seeking
+    source = config.temp_dir / "single_pass_source.mp4"
+    subprocess.run([handler.ffmpeg, "-y", "-v", "error", "-i", str(config.test_video),
+                    "-c", "copy", "-movflags", "+faststart", str(source)], capture_output=True, check=True)
+    url = server.serve("/single_pass_source.mp4", source.read_bytes())
+    
+    # Close together, so one read covering both replaces a fetch per segment
+    segments = [
+        (duration * 0.1, duration * 0.4, str(config.temp_dir / "single_pass_1.mp4")),
+        (duration * 0.5, duration * 0.9, str(config.temp_dir / "single_pass_2.mp4")),
+    ]
+    try:
+        outcome = downloader.batch_download_segments(url, segments)
+        lengths = [handler.get_duration(output) if Path(output).exists() else 0.0 for output, _ in outcome]
+        # Input seeking starts each cut on the keyframe before its start, so it may run a GOP long
+        ok = all(success for _, success in outcome) and all(
+            end - start - 0.5 <= length <= end - start + 2.5
+            for (start, end, _), length in zip(segments, lengths)
+        )
+        results.add("Single pass segments", ok, ", ".join(f"{length:.1f}s" for length in lengths))
+        
+        gets = sum(1 for method, path, _ in server.requests if method == "GET" and path == "/single_pass_source.mp4")
+        results.add("Single pass reads source once", gets == 1, f"{gets} GET request(s)")
+    except Exception as e:
+        results.add("Single pass segments", False, str(e))
+    finally:
+        server.close()
+
+
+def test_json_batch(results: TestResult):
+    """Test a JSON queue whose items share inputs, run through the batch flow."""
+    print("\n--- JSON BATCH TESTS ---")
+
+    from main import VideoCLI
+    server = RangeServer()
+    url_a = server.serve("/json_a.mp4", config.test_video.read_bytes())
+    url_b = server.serve("/json_b.mp4", config.test_video_2.read_bytes())
+    work_dir = config.temp_dir / "json_batch"
+    work_dir.mkdir(exist_ok=True)
+
+    def item(url, name, *ranges):
+        return {"input": url, "output": str(work_dir / name),
+                "segments": [{"start": start, "end": end} for start, end in ranges]}
+
+    # Two items on a, one on b, an invalid item, then a again: three groups plus a skip
+    queue = [
+        item(url_a, "a1", ("0:00:00", "0:00:02")),
+        item(url_a, "a2", ("0:00:01", "0:00:03"), ("0:00:05", "0:00:04")),
+        item(url_b, "b1", ("0:00:00", "0:00:02")),
+        {"output": str(work_dir / "missing")},
+        item(url_a, "a3", ("0:00:02", "0:00:04")),
+    ]
+    (work_dir / "queue.json").write_text(json.dumps(queue), encoding="utf-8")
+
+    cwd = os.getcwd()
+    try:
+        # The queue file is picked from the working directory
+        os.chdir(work_dir)
+        VideoCLI().process_json_input("json")
+        expected = {"a1_1.mp4", "a2_1.mp4", "b1_1.mp4", "a3_1.mp4"}
+        created = {p.name for p in work_dir.glob("*.mp4")}
+        results.add("JSON batch outputs", created == expected, ", ".join(sorted(created)) or "none")
+    except Exception as e:
+        results.add("JSON batch outputs", False, str(e))
+    finally:
+        os.chdir(cwd)
+        server.close()
+
+
+def test_streamed_range_download(results: TestResult):
+    """Test range downloads of containers with and without a leading index."""
+    print("\n--- STREAMED RANGE DOWNLOAD TESTS ---")
+    
+    import subprocess
+    downloader = get_downloader()
+    downloader.set_max_workers(2)
+    handler = downloader.ffmpeg_handler
+    duration = handler.get_duration(config.test_video)
+    server = RangeServer()
+    
+    # moov before mdat and MPEG-TS stream into ffmpeg's stdin; moov at the end needs a local copy
+    variants = [
+        ("MP4 index first", ".mp4", ["-movflags", "+faststart"]),
+        ("MP4 index last", ".mp4", []),
+        ("MPEG-TS", ".ts", []),
+    ]
+    try:
+        for name, suffix, flags in variants:
+            source = config.temp_dir / f"stream_source_{len(server.files)}{suffix}"
+            subprocess.run([handler.ffmpeg, "-y", "-v", "error", "-i", str(config.test_video),
+                            "-c", "copy", *flags, str(source)], capture_output=True, check=True)
+            url = server.serve(f"/{source.name}", source.read_bytes())
+            output = config.temp_dir / f"streamed_{source.stem}{suffix}"
+            ok = downloader.download_segment(url, 0.0, duration * 0.9, str(output))
+            length = handler.get_duration(output) if output.exists() else 0.0
+            results.add(f"Range download: {name}", ok and length > 0, f"{length:.1f}s")
+    except Exception as e:
+        results.add("Streamed range download", False, str(e))
+    finally:
+        server.close()
+
+
+# =============================================================================
+# BINARY DOWNLOAD TESTS
+# =============================================================================
+
+def test_binary_download_resume(results: TestResult):
+    """Test resumed binary downloads (If-Range) and pinned SHA256 checks."""
+    print("\n--- BINARY DOWNLOAD TESTS ---")
+    
+    from core.binary_downloader import download_with_progress, fetch_archive
+    
+    server = RangeServer()
+    content = os.urandom(256 * 1024)
+    url = server.serve("/tool.zip", content, etag='"v1"')
+    dest = config.temp_dir / "tool.zip.part"
+    validator_path = config.temp_dir / "tool.zip.part.validator"
+    try:
+        # Interrupted download with its validator saved: only the rest is fetched
+        dest.write_bytes(content[:100000])
+        validator_path.write_text('"v1"', encoding="utf-8")
+        validator = download_with_progress(url, str(dest), "tool", validator_path)
+        headers = server.requests[-1][2]
+        results.add(
+            "Resume unchanged file",
+            validator == '"v1"' and dest.read_bytes() == content
+            and headers.get("Range") == "bytes=100000-" and headers.get("If-Range") == '"v1"',
+            f"Range: {headers.get('Range')}"
+        )
+        
+        # Remote file replaced since the partial was saved: fetched from scratch
+        new_content = os.urandom(200 * 1024)
+        server.serve("/tool.zip", new_content, etag='"v2"')
+        dest.write_bytes(content[:100000])
+        validator_path.write_text('"v1"', encoding="utf-8")
+        validator = download_with_progress(url, str(dest), "tool", validator_path)
+        results.add(
+            "Restart changed file",
+            validator == '"v2"' and dest.read_bytes() == new_content
+            and validator_path.read_text(encoding="utf-8") == '"v2"'
+        )
+        
+        # Partial without a validator is never trusted
+        dest.write_bytes(b"x" * 1000)
+        validator_path.unlink()
+        download_with_progress(url, str(dest), "tool", validator_path)
+        results.add("Restart unvalidated partial", dest.read_bytes() == new_content and "Range" not in server.requests[-1][2])
+        
+        # Pinned digests: a mismatching archive is discarded, a matching one is kept
+        archive_url = server.serve(f"/pinned_{os.getpid()}.zip", content)
+        bad = fetch_archive(archive_url, "pinned", sha256="0" * 64)
+        results.add("SHA256 mismatch rejected", bad is None)
+        good = fetch_archive(archive_url, "pinned", sha256=hashlib.sha256(content).hexdigest())
+        results.add("SHA256 match accepted", good is not None and good.read_bytes() == content)
+        if good is not None:
+            for leftover in good.parent.glob(good.name + "*"):
+                leftover.unlink()
+    except Exception as e:
+        results.add("Binary download resume", False, str(e))
+    finally:
+        server.close()
+
+
 # =============================================================================
 # TELEGRAM LINK TESTS (Optional)
 # =============================================================================
@@ -519,6 +1068,29 @@ def test_telegram_link(results: TestResult):
     results.add("Telegram link detection", is_tg, TEST_TELEGRAM_LINK[:50])
 
 
+def test_tdl_link_poll(results: TestResult):
+    """Test scraping the file link from a served index page (no tdl binary needed)."""
+    print("\n--- TDL LINK POLL TESTS ---")
+    
+    from core.tdl_handler import TDLHandler, free_local_port, LINK_WAIT
+    
+    server = RangeServer()
+    try:
+        server.serve("/", b'<html><a href="/">home</a> <a href="/file/1?name=a&amp;b">video.mp4</a></html>')
+        link = TDLHandler(port=server.httpd.server_port).get_download_link()
+        expected = f"http://localhost:{server.httpd.server_port}/file/1?name=a&b"
+        results.add("TDL link scraped", link == expected, str(link))
+    finally:
+        server.close()
+    
+    # Nothing listening: polls by TCP connect only and gives up within the wait budget
+    start = time.time()
+    link = TDLHandler(port=free_local_port()).get_download_link()
+    elapsed = time.time() - start
+    results.add("TDL link gives up in budget", link is None and elapsed < LINK_WAIT + 0.5,
+                f"{elapsed:.2f}s")
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -559,12 +1131,25 @@ def run_all_tests():
         test_join_video(results)
         test_split_join(results)
         test_compress_video(results)
+        test_compress_batch(results)
         test_parallel_download(results)
         test_queue_processing(results)
         test_json_input(results)
         test_folder_input(results)
         test_multiple_files_input(results)
         test_telegram_link(results)
+        test_tdl_link_poll(results)
+        test_binary_download_resume(results)
+        test_range_download(results)
+        test_auto_workers(results)
+        test_single_pass_download(results)
+        test_json_batch(results)
+        test_streamed_range_download(results)
+        test_save_env(results)
+        test_output_extension(results)
+        test_time_conversion(results)
+        test_source_classification(results)
+        test_inspect_input(results)
         
         return results.summary()
     finally:
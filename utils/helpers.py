@@ -1,3 +1,8 @@
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+
+@lru_cache(maxsize=1024)
 def time_str_to_seconds(time_str: str) -> float:
     """
     Convert time string 'HH.MM' or 'HH:MM:SS' into total seconds.
@@ -44,6 +49,11 @@ def time_str_to_seconds(time_str: str) -> float:
             
     return total_seconds
 
+def time_strs_to_seconds(pairs: Iterable[Tuple[str, str]]) -> List[Tuple[float, float]]:
+    """Convert (start, end) time string pairs to seconds in one pass."""
+    convert = time_str_to_seconds
+    return [(convert(start), convert(end)) for start, end in pairs]
+
 def seconds_to_hms(seconds: float) -> str:
     """Convert seconds to HH:MM:SS format."""
     m, s = divmod(seconds, 60)
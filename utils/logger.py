@@ -28,6 +28,16 @@ class ColorLogger:
         self.name = name
         self._spinner_stop = threading.Event()
         self._spinner_thread: Optional[threading.Thread] = None
+        # Serializes console writes from worker threads
+        self._write_lock = threading.Lock()
+    
+    def _write(self, text: str, end: str = "\n", flush: bool = False, file=None):
+        """Write one record with a single call, so lines from worker threads never interleave."""
+        stream = file or sys.stdout
+        with self._write_lock:
+            stream.write(text + end)
+            if flush:
+                stream.flush()
     
     def _format_prefix(self, level: str, symbol: str, color: str) -> str:
         """Format colored prefix with timestamp."""
@@ -37,38 +47,41 @@ class ColorLogger:
     def info(self, message: str, **kwargs):
         """Log info message in cyan."""
         prefix = self._format_prefix("INFO", self.INFO, "cyan")
-        print(f"{prefix}{message}", **kwargs)
+        self._write(f"{prefix}{message}", **kwargs)
     
     def success(self, message: str, **kwargs):
         """Log success message in green."""
         prefix = self._format_prefix("SUCCESS", self.SUCCESS, "green")
-        print(f"{prefix}{colored(message, 'green')}", **kwargs)
+        self._write(f"{prefix}{colored(message, 'green')}", **kwargs)
     
     def error(self, message: str, details: Optional[str] = None, **kwargs):
         """Log error message in red with optional details."""
         prefix = self._format_prefix("ERROR", self.ERROR, "red")
-        print(f"{prefix}{colored(message, 'red')}", **kwargs)
+        text = f"{prefix}{colored(message, 'red')}"
         if details:
-            # Print indented details
-            for line in details.strip().split('\n'):
-                print(f"         {colored(line, 'red', attrs=['dark'])}")
+            # Indented details go out in the same write as the message
+            text += "".join(
+                f"\n         {colored(line, 'red', attrs=['dark'])}"
+                for line in details.strip().split('\n')
+            )
+        self._write(text, **kwargs)
     
     def warning(self, message: str, **kwargs):
         """Log warning message in yellow."""
         prefix = self._format_prefix("WARNING", self.WARNING, "yellow")
-        print(f"{prefix}{colored(message, 'yellow')}", **kwargs)
+        self._write(f"{prefix}{colored(message, 'yellow')}", **kwargs)
     
     def step(self, step_num: int, total: int, message: str, **kwargs):
         """Log numbered step."""
         step_str = colored(f"[{step_num}/{total}]", "magenta", attrs=["bold"])
-        print(f"         {step_str} {message}", **kwargs)
+        self._write(f"         {step_str} {message}", **kwargs)
     
     def encoding(self, encoder: str, is_hardware: bool = False):
         """Log encoding information with highlighting."""
         prefix = self._format_prefix("INFO", self.ARROW, "cyan")
         enc_type = colored("Hardware", "green", attrs=["bold"]) if is_hardware else colored("Software", "yellow")
         enc_name = colored(encoder, "white", attrs=["bold"])
-        print(f"{prefix}Encoder: {enc_name} ({enc_type})")
+        self._write(f"{prefix}Encoder: {enc_name} ({enc_type})")
     
     def progress(self, current: float, total: float, elapsed: float, speed: float = 0.0):
         """Display progress bar with time info."""
@@ -93,11 +106,11 @@ class ColorLogger:
         speed_str = f"{speed:.1f}x" if speed > 0 else "--"
         status = f"\r         {bar} {pct:5.1f}% | {colored('Elapsed:', attrs=['dark'])} {elapsed_str} | {colored('ETA:', attrs=['dark'])} {eta_str} | {colored('Speed:', attrs=['dark'])} {speed_str}"
         
-        print(status, end="", flush=True)
+        self._write(status, end="", flush=True)
     
     def progress_done(self):
         """Clear progress line and print newline."""
-        print()  # New line after progress bar
+        self._write("")  # New line after progress bar
     
     def _format_time(self, seconds: float) -> str:
         """Format seconds to MM:SS or HH:MM:SS."""
@@ -118,7 +131,7 @@ class ColorLogger:
             idx = 0
             while not self._spinner_stop.is_set():
                 char = colored(chars[idx % len(chars)], "cyan")
-                print(f"\r         {char} {message}...", end="", flush=True)
+                self._write(f"\r         {char} {message}...", end="", flush=True)
                 idx += 1
                 time.sleep(0.1)
         
@@ -130,7 +143,7 @@ class ColorLogger:
         self._spinner_stop.set()
         if self._spinner_thread:
             self._spinner_thread.join(timeout=0.5)
-        print("\r" + " " * 60 + "\r", end="")  # Clear line
+        self._write("\r" + " " * 60 + "\r", end="")  # Clear line
         if final_message:
             if success:
                 self.success(final_message)
@@ -139,13 +152,11 @@ class ColorLogger:
     
     def section(self, title: str):
         """Print section header."""
-        print()
-        print(colored(f"  ═══ {title} ═══", "white", attrs=["bold"]))
-        print()
+        self._write(f"\n{colored(f'  ═══ {title} ═══', 'white', attrs=['bold'])}\n")
     
     def detail(self, label: str, value: str):
         """Print labeled detail line."""
-        print(f"         {colored(label + ':', attrs=['dark'])} {value}")
+        self._write(f"         {colored(label + ':', attrs=['dark'])} {value}")
 
 
 # Global logger instance
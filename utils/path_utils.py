@@ -3,14 +3,16 @@ Path and input utilities for Video Tools CLI.
 Handles path normalization, multi-file input, and folder expansion.
 """
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
 
 # Supported video extensions
 VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.ts', '.mts'}
 
 
+@lru_cache(maxsize=1024)
 def normalize_path(path: str) -> str:
     """
     Normalize a path string:
@@ -35,6 +37,69 @@ def normalize_path(path: str) -> str:
     return path
 
 
+def classify_source(path: str) -> str:
+    """
+    Classify an input once so callers can branch on the result.
+    
+    Returns:
+        'tdl' for Telegram links, 'http' for other URLs, 'local' for everything else
+    """
+    if "t.me/" in path:
+        return "tdl"
+    if path.startswith("http"):
+        return "http"
+    return "local"
+
+
+class InputInfo(NamedTuple):
+    """A user input classified once, so a flow never re-derives these values."""
+    path: str
+    source: str
+    folder: Path
+    stem: str
+    
+    @property
+    def is_url(self) -> bool:
+        return self.source != "local"
+    
+    @property
+    def is_tdl(self) -> bool:
+        return self.source == "tdl"
+
+
+def inspect_input(raw_input: str, url_stem: str = "output") -> InputInfo:
+    """
+    Normalize and classify an input in one step.
+    
+    Args:
+        url_stem: Stem used for URLs, whose outputs go to the current folder
+    """
+    path = normalize_path(raw_input)
+    source = classify_source(path)
+    if source == "local":
+        local = Path(path)
+        return InputInfo(path, source, local.parent, local.stem)
+    return InputInfo(path, source, Path("."), url_stem)
+
+
+def path_exists(path) -> bool:
+    """Check if a path exists with a single stat call."""
+    try:
+        os.stat(path)
+        return True
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def list_dir_names(folder) -> set:
+    """Get names of all entries in a folder with one directory scan."""
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
 def is_video_file(path: str) -> bool:
     """Check if path is a video file."""
     return Path(path).suffix.lower() in VIDEO_EXTENSIONS
@@ -58,7 +123,7 @@ def expand_input(raw_input: str) -> List[str]:
     raw_input = raw_input.strip()
     
     # Check if it's a URL
-    if raw_input.startswith("http") or "t.me/" in raw_input:
+    if classify_source(raw_input) != "local":
         return [raw_input]
     
     # Try to parse as single path first
@@ -84,14 +149,18 @@ def expand_input(raw_input: str) -> List[str]:
 
 def get_videos_in_folder(folder_path: str) -> List[str]:
     """Get all video files in a folder (non-recursive)."""
-    folder = Path(folder_path)
-    videos = []
-    
-    for file in sorted(folder.iterdir()):
-        if file.is_file() and file.suffix.lower() in VIDEO_EXTENSIONS:
-            videos.append(str(file.resolve()))
-    
-    return videos
+    folder = Path(folder_path).resolve()
+    
+    # Extension check first; is_file() uses the dirent type and rarely needs a stat
+    with os.scandir(folder) as entries:
+        names = [
+            entry.name for entry in entries
+            if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS and entry.is_file()
+        ]
+    
+    # normcase keeps the case-insensitive ordering Path sorting had on Windows
+    names.sort(key=os.path.normcase)
+    return [str(folder / name) for name in names]
 
 
 def parse_multiple_paths(raw_input: str) -> List[str]:
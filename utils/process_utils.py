@@ -0,0 +1,77 @@
+"""
+Child process utilities for Video Tools CLI.
+Starts helpers in their own process group so a whole tree can be stopped at once.
+"""
+import os
+import signal
+import atexit
+import subprocess
+import threading
+
+
+# Popen kwargs that put the child (and anything it spawns) in a new process group
+if os.name == "nt":
+    NEW_GROUP_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    NEW_GROUP_KWARGS = {"start_new_session": True}
+
+_LIVE = set()
+_LIVE_LOCK = threading.Lock()
+
+
+def terminate_group(process: subprocess.Popen, timeout: float = 3.0):
+    """
+    Stop a process started with NEW_GROUP_KWARGS together with its children.
+    Sends a polite stop first, then force-kills the group after timeout seconds.
+    """
+    if process.poll() is not None:
+        return
+
+    if os.name == "nt":
+        # taskkill /T walks the child tree; fall back to the single process
+        result = subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if result.returncode != 0:
+            process.kill()
+        process.wait(timeout=timeout)
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=timeout)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait(timeout=timeout)
+
+
+def track(process: subprocess.Popen):
+    """Remember a running child so it is stopped if the app exits first."""
+    with _LIVE_LOCK:
+        _LIVE.add(process)
+
+
+def untrack(process: subprocess.Popen):
+    """Forget a child that has finished."""
+    with _LIVE_LOCK:
+        _LIVE.discard(process)
+
+
+@atexit.register
+def terminate_tracked():
+    """Stop every tracked child (children in their own group miss Ctrl+C)."""
+    with _LIVE_LOCK:
+        processes = list(_LIVE)
+        _LIVE.clear()
+    for process in processes:
+        try:
+            terminate_group(process, timeout=1.0)
+        except (OSError, subprocess.SubprocessError):
+            pass
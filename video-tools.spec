@@ -0,0 +1,63 @@
+# -*- mode: python ; coding: utf-8 -*-
+"""
+PyInstaller spec for Video Tools CLI.
+Build with: python build.py
+"""
+import os
+
+APP_NAME = "video-tools"
+ICON_PATH = os.path.join(SPECPATH, "assets", "icon.ico")
+
+# Hidden imports
+HIDDEN_IMPORTS = [
+    "colorama",
+    "termcolor",
+    "InquirerPy",
+    "prompt_toolkit",
+    "requests",
+    "tqdm",
+]
+
+# Stdlib/tooling modules never used at runtime
+EXCLUDED_MODULES = [
+    "tkinter", "unittest", "pydoc", "distutils", "test",
+    "setuptools", "pip", "wheel",
+]
+
+
+a = Analysis(
+    ["main.py"],
+    pathex=[SPECPATH],
+    binaries=[],
+    datas=[("requirements.txt", ".")],
+    hiddenimports=HIDDEN_IMPORTS,
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=EXCLUDED_MODULES,
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name=APP_NAME,
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=ICON_PATH if os.path.exists(ICON_PATH) else None,
+)